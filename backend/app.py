@@ -2,13 +2,18 @@
 API Flask para o Sistema de Apoio à Decisão
 Versão 2.0 com Classificação, Agrupamento e Regressão
 """
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 from config import Config
-from models.recursos import RecursosRepository
+from models.recursos import RecursoTecnologico, RepositorioFechado
 from models.questionario import RespostasQuestionario
 from services.recomendacao import SistemaRecomendacao
+from services.catalogos import GerenciadorCatalogos, CatalogoIndisponivel, CatalogoNaoEncontrado
+from services.classificacao import ClassificadorRecursos
+from services.motor import SnapshotDesatualizado
+from services.perfilamento import PerfiladorRequisicoes
 import logging
+import re
 
 # Configurar logging
 logging.basicConfig(
@@ -21,22 +26,151 @@ app = Flask(__name__)
 app.config.from_object(Config)
 CORS(app)
 
-# Inicializa repositório de recursos
-recursos_repo = RecursosRepository()
+# Catálogos carregados sob demanda (o padrão já na inicialização)
+catalogos = GerenciadorCatalogos()
+catalogos.obter(Config.CATALOGO_PADRAO)
+perfilador = PerfiladorRequisicoes()
+
+PREFIXO_CATALOGO = re.compile(r'^/api/catalogos/([^/]+)(/.+)$')
+
+
+class PrefixoCatalogo:
+    """Atende /api/catalogos/<nome>/... como /api/... com o cabeçalho de catálogo"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.chave_cabecalho = 'HTTP_' + Config.CATALOGO_CABECALHO.upper().replace('-', '_')
+
+    def __call__(self, environ, start_response):
+        correspondencia = PREFIXO_CATALOGO.match(environ.get('PATH_INFO', ''))
+        if correspondencia:
+            environ[self.chave_cabecalho] = correspondencia.group(1)
+            environ['PATH_INFO'] = '/api' + correspondencia.group(2)
+        return self.wsgi_app(environ, start_response)
+
+
+app.wsgi_app = PrefixoCatalogo(app.wsgi_app)
+
+
+def _obter_catalogo():
+    """(repositório, CatalogoRecursos) do catálogo selecionado pela requisição"""
+    pacote = catalogos.obter(request.headers.get(Config.CATALOGO_CABECALHO))
+    # Escritas de outros processos no mesmo SQLite
+    try:
+        pacote.catalogo.sincronizar()
+    except Exception as e:
+        logger.error(f"Erro ao sincronizar o catálogo '{pacote.nome}': {str(e)}", exc_info=True)
+        raise CatalogoIndisponivel(pacote.nome, e) from e
+    return pacote.repositorio, pacote.catalogo
+
+
+def _escrever(recursos_repo, escrita):
+    """
+    Aplica escrita(repositório). Se o catálogo foi descarregado (LRU) depois
+    de obtido, o repositório recusa a escrita sem aplicá-la: repete no recarregado
+    """
+    try:
+        return escrita(recursos_repo)
+    except RepositorioFechado:
+        recursos_repo, _ = _obter_catalogo()
+        return escrita(recursos_repo)
+
+
+@app.errorhandler(CatalogoNaoEncontrado)
+def catalogo_nao_encontrado(e):
+    return jsonify({
+        'success': False,
+        'error': str(e)
+    }), 404
+
+
+@app.errorhandler(CatalogoIndisponivel)
+def catalogo_indisponivel(e):
+    return jsonify({
+        'success': False,
+        'error': str(e)
+    }), 503
+
+# Parâmetros de consulta de /api/recursos -> campo indexado do repositório
+FILTROS_LISTAGEM = {
+    'area': 'area',
+    'categoria': 'categoria',
+    'tag': 'tags',
+    'modalidade': 'modalidades',
+    'dispositivo': 'dispositivos',
+    'offline': 'offline',
+    'avaliacao': 'avaliacao'
+}
+CAMPOS_RECURSO = set(RecursoTecnologico.CAMPOS)
+
+def _ler_parametros_listagem(args):
+    """Converte a query string de /api/recursos em filtros, paginação e projeção"""
+    filtros = []
+    for parametro, campo in FILTROS_LISTAGEM.items():
+        for valor in args.getlist(parametro):
+            if campo in ('offline', 'avaliacao'):
+                if valor.lower() not in ('true', 'false'):
+                    raise ValueError(f"Parâmetro '{parametro}' deve ser true ou false")
+                valor = valor.lower() == 'true'
+            filtros.append((campo, valor))
+
+    limite = args.get('limit')
+    if limite is not None:
+        if not limite.isdigit() or int(limite) < 1:
+            raise ValueError("Parâmetro 'limit' deve ser um inteiro positivo")
+        limite = min(int(limite), Config.LISTAGEM_LIMITE_MAXIMO)
+
+    cursor = args.get('cursor')
+    if cursor is not None:
+        try:
+            cursor = int(cursor)
+        except ValueError:
+            raise ValueError("Parâmetro 'cursor' inválido")
+
+    campos = None
+    if args.get('campos'):
+        campos = [c.strip() for c in args['campos'].split(',') if c.strip()]
+        desconhecidos = [c for c in campos if c not in CAMPOS_RECURSO]
+        if desconhecidos:
+            raise ValueError(f"Campos desconhecidos: {', '.join(desconhecidos)}")
+    return filtros, limite, cursor, campos
 
 @app.route('/api/recursos', methods=['GET'])
 def listar_recursos():
     """
     GET /api/recursos
-    Retorna lista de todos os recursos disponíveis
+    Retorna os recursos disponíveis, em ordem de id
+    
+    Query params (todos opcionais, combinados com E lógico):
+        area, categoria, tag, modalidade, dispositivo: valor exato (repetível)
+        offline, avaliacao: true | false
+        limit: tamanho da página (sem limit, retorna todos os resultados)
+        cursor: valor de 'proximo_cursor' da página anterior
+        campos: projeção, ex. campos=id,nome,area
     """
+    recursos_repo, _ = _obter_catalogo()
     try:
-        recursos = recursos_repo.obter_todos()
+        filtros, limite, cursor, campos = _ler_parametros_listagem(request.args)
+        recursos, proximo_cursor = recursos_repo.listar(filtros, limite, cursor)
         logger.info(f"Listando {len(recursos)} recursos")
+        if campos:
+            dados = [{c: getattr(r, c) for c in campos} for r in recursos]
+        else:
+            dados = [r.to_dict() for r in recursos]
         return jsonify({
             'success': True,
-            'data': [r.to_dict() for r in recursos]
+            'data': dados,
+            'paginacao': {
+                'limite': limite,
+                'proximo_cursor': str(proximo_cursor) if proximo_cursor is not None else None
+            }
         })
+    except ValueError as e:
+        logger.warning(f"Parâmetros de listagem inválidos: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Erro de validação: {str(e)}'
+        }), 400
     except Exception as e:
         logger.error(f"Erro ao listar recursos: {str(e)}")
         return jsonify({
@@ -44,12 +178,183 @@ def listar_recursos():
             'error': str(e)
         }), 500
 
+@app.route('/api/recursos/busca', methods=['GET'])
+def buscar_recursos():
+    """
+    GET /api/recursos/busca?q=simulação química
+    Busca textual em nome, descrição, categoria e tags, ranqueada por BM25
+    
+    Query params:
+        q: texto da busca (obrigatório)
+        limit: número de resultados (padrão: BUSCA_LIMITE_PADRAO)
+        peso_score: 0 a 1, mistura a relevância com o scoreFinal da regressão
+    """
+    recursos_repo, catalogo = _obter_catalogo()
+    try:
+        consulta = request.args.get('q', '').strip()
+        if not consulta:
+            raise ValueError("Parâmetro 'q' é obrigatório")
+        limite = request.args.get('limit', str(Config.BUSCA_LIMITE_PADRAO))
+        if not limite.isdigit() or int(limite) < 1:
+            raise ValueError("Parâmetro 'limit' deve ser um inteiro positivo")
+        limite = min(int(limite), Config.LISTAGEM_LIMITE_MAXIMO)
+        try:
+            peso_score = float(request.args.get('peso_score', Config.BUSCA_PESO_SCORE))
+        except ValueError:
+            raise ValueError("Parâmetro 'peso_score' deve ser numérico")
+        if not 0.0 <= peso_score <= 1.0:
+            raise ValueError("Parâmetro 'peso_score' deve estar entre 0 e 1")
+        
+        total, resultados = catalogo.busca.buscar(
+            consulta, limite, pesos=catalogo.motor.pesos, peso_score=peso_score
+        )
+        recursos = recursos_repo.obter_por_ids([r[0] for r in resultados])
+        dados = [
+            {**recurso.to_dict(), 'relevancia': relevancia, 'scoreFinal': score_final, 'score': score}
+            for recurso, (_, relevancia, score_final, score) in zip(recursos, resultados)
+            if recurso is not None
+        ]
+        logger.info(f"Busca '{consulta}': {total} recursos encontrados")
+        return jsonify({
+            'success': True,
+            'data': dados,
+            'total': total
+        })
+    except ValueError as e:
+        logger.warning(f"Parâmetros de busca inválidos: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Erro de validação: {str(e)}'
+        }), 400
+    except Exception as e:
+        logger.error(f"Erro na busca: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/recursos', methods=['POST'])
+def criar_recurso():
+    """
+    POST /api/recursos
+    Cadastra um novo recurso (o id é gerado se não for informado)
+    """
+    recursos_repo, _ = _obter_catalogo()
+    try:
+        dados = request.get_json(silent=True)
+        if not isinstance(dados, dict):
+            return jsonify({
+                'success': False,
+                'error': 'Dados do recurso devem ser um objeto JSON'
+            }), 400
+        recurso = _escrever(recursos_repo, lambda repositorio: repositorio.inserir(dados))
+        logger.info(f"Recurso {recurso.id} cadastrado")
+        return jsonify({
+            'success': True,
+            'data': recurso.to_dict()
+        }), 201
+    except ValueError as e:
+        logger.warning(f"Erro de validação ao cadastrar recurso: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Erro de validação: {str(e)}'
+        }), 400
+    except Exception as e:
+        logger.error(f"Erro ao cadastrar recurso: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/recursos/<int:recurso_id>', methods=['PUT'])
+def atualizar_recurso(recurso_id):
+    """
+    PUT /api/recursos/<id>
+    Atualiza um recurso (campos omitidos mantêm o valor atual)
+    """
+    recursos_repo, _ = _obter_catalogo()
+    try:
+        dados = request.get_json(silent=True)
+        if not isinstance(dados, dict):
+            return jsonify({
+                'success': False,
+                'error': 'Dados do recurso devem ser um objeto JSON'
+            }), 400
+        recurso = _escrever(recursos_repo, lambda repositorio: repositorio.atualizar(recurso_id, dados))
+        if recurso is None:
+            return jsonify({
+                'success': False,
+                'error': f'Recurso {recurso_id} não encontrado'
+            }), 404
+        logger.info(f"Recurso {recurso_id} atualizado")
+        return jsonify({
+            'success': True,
+            'data': recurso.to_dict()
+        })
+    except ValueError as e:
+        logger.warning(f"Erro de validação ao atualizar recurso: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Erro de validação: {str(e)}'
+        }), 400
+    except Exception as e:
+        logger.error(f"Erro ao atualizar recurso: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/recursos/<int:recurso_id>', methods=['DELETE'])
+def remover_recurso(recurso_id):
+    """
+    DELETE /api/recursos/<id>
+    Remove um recurso do catálogo
+    """
+    recursos_repo, _ = _obter_catalogo()
+    try:
+        recurso = _escrever(recursos_repo, lambda repositorio: repositorio.remover(recurso_id))
+        if recurso is None:
+            return jsonify({
+                'success': False,
+                'error': f'Recurso {recurso_id} não encontrado'
+            }), 404
+        logger.info(f"Recurso {recurso_id} removido")
+        return jsonify({
+            'success': True,
+            'data': recurso.to_dict()
+        })
+    except Exception as e:
+        logger.error(f"Erro ao remover recurso: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _recomendar(recursos_repo, catalogo, dados):
+    """Pipeline de recomendação de um questionário (perfilado por inteiro quando ativo)"""
+    respostas = RespostasQuestionario(dados)
+    
+    if Config.CLASSIFICACAO_MODO == 'regras':
+        # Elegibilidade, ranking e clusters vêm da visão materializada, lidos
+        # todos na versão de um mesmo snapshot do catálogo
+        return catalogo.consultar(lambda motor: motor.recomendar(respostas))
+
+    # Modo 'arvore': árvore de decisão e K-Means treinados por requisição sobre
+    # o catálogo inteiro; do motor compartilhado vêm só os pesos da regressão
+    motor = catalogo.motor
+    sistema = SistemaRecomendacao(
+        respostas, recursos_repo.obter_todos(),
+        pesos=motor.pesos, metricas_regressao=motor.metricas_regressao
+    )
+    return sistema.gerar_recomendacoes()
+
 @app.route('/api/recomendacoes', methods=['POST'])
 def gerar_recomendacoes():
     """
     POST /api/recomendacoes
     Gera recomendações baseado nas respostas do questionário
     """
+    recursos_repo, catalogo = _obter_catalogo()
     try:
         # Valida request
         dados = request.get_json()
@@ -62,22 +367,22 @@ def gerar_recomendacoes():
         
         logger.info(f"Gerando recomendações para disciplina: {dados.get('disciplina')}")
         
-        # Cria objeto de respostas
-        respostas = RespostasQuestionario(dados)
-        
-        # Obtém recursos
-        recursos = recursos_repo.obter_todos()
-        
-        # Gera recomendações usando o novo sistema integrado
-        sistema = SistemaRecomendacao(respostas, recursos)
-        resultado = sistema.gerar_recomendacoes()
+        nome_perfil = None
+        motivo = perfilador.motivo(request.headers.get(Config.PERFIL_CABECALHO)) if perfilador.ativo else None
+        if motivo:
+            resultado, nome_perfil = perfilador.executar(dados, motivo, _recomendar, recursos_repo, catalogo, dados)
+        else:
+            resultado = _recomendar(recursos_repo, catalogo, dados)
 
         logger.info(f"Recomendações geradas com sucesso. Total: {len(resultado['ranking'])}")
         
-        return jsonify({
+        resposta = jsonify({
             'success': True,
             'data': resultado
         })
+        if nome_perfil:
+            resposta.headers['X-Perfil-Id'] = nome_perfil
+        return resposta
         
     except ValueError as e:
         logger.error(f"Erro de validação: {str(e)}")
@@ -85,6 +390,13 @@ def gerar_recomendacoes():
             'success': False,
             'error': f'Erro de validação: {str(e)}'
         }), 400
+    except SnapshotDesatualizado as e:
+        # Catálogo alterado a cada tentativa: o cliente pode repetir
+        logger.warning(f"Recomendação sem snapshot estável: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Catálogo em atualização, tente novamente'
+        }), 503
     except Exception as e:
         logger.error(f"Erro interno: {str(e)}", exc_info=True)
         return jsonify({
@@ -125,16 +437,30 @@ def obter_metodologia():
             }
         }
     """
+    # A elegibilidade depende do modo configurado (CLASSIFICACAO_MODO)
+    if Config.CLASSIFICACAO_MODO == 'regras':
+        classificacao = {
+            'nome': 'Classificação (regras de elegibilidade)',
+            'descricao': 'Aplica as 6 regras de negócio como consulta indexada no repositório; elegíveis, ranking e clusters de cada combinação de respostas ficam em visões materializadas',
+            'biblioteca': 'Índices do repositório (memória ou SQLite)',
+            'peso': 'Filtro binário (elegível/não elegível)'
+        }
+        passo_classificacao = '2. Regras de negócio filtram recursos elegíveis (consulta indexada, visões materializadas)'
+    else:
+        classificacao = {
+            'nome': 'Classificação (Decision Tree)',
+            'descricao': 'Filtra recursos incompatíveis usando árvore de decisão com 6 regras de negócio',
+            'biblioteca': 'Scikit-learn DecisionTreeClassifier',
+            'peso': 'Filtro binário (elegível/não elegível)'
+        }
+        passo_classificacao = '2. Decision Tree filtra recursos elegíveis (critérios de negócio)'
+
     return jsonify({
         'success': True,
         'data': {
+            'modo_classificacao': Config.CLASSIFICACAO_MODO,
             'funcoes': [
-                {
-                    'nome': 'Classificação (Decision Tree)',
-                    'descricao': 'Filtra recursos incompatíveis usando árvore de decisão com 6 regras de negócio',
-                    'biblioteca': 'Scikit-learn DecisionTreeClassifier',
-                    'peso': 'Filtro binário (elegível/não elegível)'
-                },
+                classificacao,
                 {
                     'nome': 'Agrupamento (K-Means)',
                     'descricao': 'Agrupa recursos elegíveis em clusters semânticos com nomes descritivos',
@@ -169,7 +495,7 @@ def obter_metodologia():
             ],
             'fluxo_pipeline': [
                 '1. Regressão Linear treina para obter pesos ótimos',
-                '2. Decision Tree filtra recursos elegíveis (critérios de negócio)',
+                passo_classificacao,
                 '3. K-Means agrupa recursos em clusters semânticos',
                 '4. Score final calcula compatibilidade com pesos da regressão',
                 '5. Ranking ordena recursos por score final (descendente)'
@@ -190,6 +516,7 @@ def obter_diagnostico():
     Retorna informações detalhadas sobre o processo de recomendação
     (útil para debug e análise)
     """
+    recursos_repo, catalogo = _obter_catalogo()
     try:
         dados = request.get_json()
         if not dados:
@@ -200,15 +527,15 @@ def obter_diagnostico():
         
         respostas = RespostasQuestionario(dados)
         recursos = recursos_repo.obter_todos()
-        sistema = SistemaRecomendacao(respostas, recursos)
+        classificador = ClassificadorRecursos(respostas)
         
         # Executa apenas classificação para diagnóstico
-        recursos_elegiveis = sistema.classificador.filtrar_recursos_elegiveis(recursos)
-        importancia_features = sistema.classificador.obter_importancia_features()
+        recursos_elegiveis = classificador.filtrar_recursos_elegiveis(recursos)
+        importancia_features = classificador.obter_importancia_features()
         
-        # Executa regressão para diagnóstico
-        pesos = sistema.regressor.treinar_regressao(recursos)
-        metricas_regressao = sistema.regressor.obter_metricas()
+        # Regressão e agrupamento são mantidos pelo catálogo
+        motor = catalogo.motor
+        metricas_regressao = dict(motor.metricas_regressao)
         
         logger.info("Diagnóstico gerado com sucesso")
         
@@ -222,6 +549,8 @@ def obter_diagnostico():
                     'importancia_features': importancia_features
                 },
                 'regressao': metricas_regressao,
+                'agrupamento_catalogo': dict(motor.resumo_agrupamento),
+                'visoes_elegibilidade': catalogo.visoes.obter_estatisticas(),
                 'recursos': [r.to_dict() for r in recursos]
             }
         })
@@ -233,6 +562,58 @@ def obter_diagnostico():
             'error': str(e)
         }), 500
 
+@app.route('/api/catalogos', methods=['GET'])
+def listar_catalogos():
+    """
+    GET /api/catalogos
+    Catálogos disponíveis e métricas do LRU de catálogos carregados
+    """
+    return jsonify({
+        'success': True,
+        'data': {
+            'disponiveis': catalogos.listar_disponiveis(),
+            'padrao': Config.CATALOGO_PADRAO,
+            **catalogos.obter_estatisticas()
+        }
+    })
+
+@app.route('/api/admin/perfis', methods=['GET'])
+def listar_perfis():
+    """
+    GET /api/admin/perfis
+    Lista os perfis gravados (requer o cabeçalho de administrador)
+    """
+    if not perfilador.autorizado(request.headers.get(Config.PERFIL_CABECALHO)):
+        return jsonify({
+            'success': False,
+            'error': 'Acesso restrito a administradores'
+        }), 403
+    
+    return jsonify({
+        'success': True,
+        'data': perfilador.listar()
+    })
+
+@app.route('/api/admin/perfis/<nome>', methods=['GET'])
+def obter_perfil(nome):
+    """
+    GET /api/admin/perfis/<nome>?arquivo=txt|prof|json
+    Baixa o relatório em texto (padrão), as estatísticas do cProfile ou os metadados
+    """
+    if not perfilador.autorizado(request.headers.get(Config.PERFIL_CABECALHO)):
+        return jsonify({
+            'success': False,
+            'error': 'Acesso restrito a administradores'
+        }), 403
+    
+    caminho = perfilador.caminho_arquivo(nome, request.args.get('arquivo', 'txt'))
+    if caminho is None:
+        return jsonify({
+            'success': False,
+            'error': f'Perfil não encontrado: {nome}'
+        }), 404
+    return send_file(caminho, as_attachment=caminho.endswith('.prof'))
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -0,0 +1,97 @@
+"""
+BENCHMARK DE PRECISÃO - scoreFinal em float64 x float32
+
+Compara o cálculo vetorizado do scoreFinal (services.visoes.calcular_scores,
+float64) com um cálculo equivalente em float32: os scores são calculados em
+float32 e só as linhas cujo erro de arredondamento pode mudar o valor com 4
+casas são recalculadas em float64. Confere que ids, ordem e scoreFinal são
+idênticos e mede tempo e memória da matriz de características.
+
+Uso:
+    python benchmark_precisao.py [-n 20000 200000] [--repeticoes 50]
+
+Sai com código 1 se algum score divergir.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from models.recursos import CARACTERISTICAS
+from services.visoes import calcular_scores
+
+U32 = np.finfo(np.float32).eps / 2
+
+
+def gerar_matriz(n, rng):
+    """Características com duas casas decimais em [0, 1], como no catálogo"""
+    return rng.integers(0, 101, size=(n, len(CARACTERISTICAS))) / 100
+
+
+def calcular_scores_float32(X32, pesos, X):
+    """
+    scoreFinal a partir da matriz em float32. O erro do produto escalar em
+    float32 é limitado por (k + 3)·u·Σ|w|·max|x|; linhas a menos disso de uma
+    fronteira de arredondamento (x,xxxx5) são recalculadas em float64 a partir
+    das características exatas `X` (que o repositório precisaria manter)
+    """
+    w = np.array([pesos[c] for c in CARACTERISTICAS])
+    w32 = w.astype(np.float32)
+    score = X32[:, 0] * w32[0]
+    for j in range(1, len(CARACTERISTICAS)):
+        score = score + X32[:, j] * w32[j]
+
+    escalado = score.astype(np.float64) * 1e4
+    scores = np.rint(escalado) / 1e4
+    limite = (len(CARACTERISTICAS) + 3) * U32 * np.abs(w).sum() * float(X32.max(initial=0.0)) * 1e4
+    suspeitas = np.flatnonzero(np.abs(escalado - np.floor(escalado) - 0.5) <= limite)
+    if len(suspeitas):
+        scores[suspeitas] = calcular_scores(X[suspeitas], pesos)
+    return scores, len(suspeitas)
+
+
+def medir(funcao, repeticoes):
+    """Menor tempo (ms) entre as repetições"""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='scoreFinal em float64 x float32')
+    parser.add_argument('-n', type=int, nargs='+', default=[20000, 200000], help='Linhas da matriz')
+    parser.add_argument('--repeticoes', type=int, default=50)
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.semente)
+    divergencias = 0
+    for n in args.n:
+        X = gerar_matriz(n, rng)
+        X32 = X.astype(np.float32)
+        pesos = dict(zip(CARACTERISTICAS, rng.dirichlet(np.ones(len(CARACTERISTICAS)))))
+
+        scores64 = calcular_scores(X, pesos)
+        scores32, suspeitas = calcular_scores_float32(X32, pesos, X)
+        ordem64 = np.argsort(-scores64, kind='stable')
+        ordem32 = np.argsort(-scores32, kind='stable')
+        iguais = np.array_equal(scores64, scores32) and np.array_equal(ordem64, ordem32)
+        divergencias += not iguais
+
+        t64 = medir(lambda: calcular_scores(X, pesos), args.repeticoes)
+        t32 = medir(lambda: calcular_scores_float32(X32, pesos, X), args.repeticoes)
+        print(
+            f"n={n}: float64 {t64:.2f} ms ({X.nbytes / 2**20:.1f} MB) | "
+            f"float32 {t32:.2f} ms ({X32.nbytes / 2**20:.1f} MB, "
+            f"{suspeitas} linhas recalculadas em float64) | "
+            f"ranking e scoreFinal {'iguais' if iguais else 'DIVERGENTES'}"
+        )
+    return 1 if divergencias else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,6 +16,7 @@ class Config:
     
     # Recomendações
     NUM_RECOMENDACOES = 50
+    LISTAGEM_LIMITE_MAXIMO = 1000  # Maior página aceita em GET /api/recursos
     NUM_CLUSTERS = 6  # K-Means clustering
     
     # Pesos da Regressão (serão calculados dinamicamente)
@@ -28,6 +29,19 @@ class Config:
         'custoAcessibilidade': 0.17
     }
     
+    # Busca textual (GET /api/recursos/busca): BM25 com peso por campo
+    BUSCA_PESOS_CAMPOS = {'nome': 3.0, 'categoria': 2.0, 'tags': 1.5, 'descricao': 1.0}
+    BUSCA_BM25_K1 = 1.2
+    BUSCA_BM25_B = 0.75
+    BUSCA_LIMITE_PADRAO = 20
+    BUSCA_PESO_SCORE = 0.0  # Peso do scoreFinal da regressão na ordenação (0 a 1)
+    
+    # Elegibilidade: 'arvore' (Decision Tree treinada a cada requisição) ou
+    # 'regras' (pré-filtragem indexada e visões materializadas; mais rápido,
+    # mas a elegibilidade exata das regras difere da aproximada pela árvore)
+    CLASSIFICACAO_MODO = os.environ.get('CLASSIFICACAO_MODO', 'arvore')
+    SNAPSHOT_TENTATIVAS = 5  # Leituras repetidas se o catálogo mudar durante uma recomendação
+    
     # Limites de features para classificação
     MIN_FACILIDADE = 0.7
     MIN_ENGAJAMENTO = 0.75
@@ -44,7 +58,40 @@ class Config:
     
     # Dados
     DADOS_DIR = os.path.join(os.path.dirname(__file__), 'data')
-    RECURSOS_JSON = os.path.join(DADOS_DIR, 'recursos_base.json')
+    RECURSOS_JSON = os.environ.get('RECURSOS_JSON', os.path.join(DADOS_DIR, 'recursos_base.json'))
+    CHANGELOG_LIMITE_COMPACTACAO = 100  # Entradas no log antes de compactar
+    
+    # Repositório de recursos: 'json' (catálogo em memória) ou 'sqlite'
+    REPOSITORIO_BACKEND = os.environ.get('REPOSITORIO_BACKEND', 'json')
+    RECURSOS_SQLITE = os.path.join(DADOS_DIR, 'recursos.sqlite3')
+    SQLITE_CACHE_STATEMENTS = 256
+    SQLITE_POOL_MAX = 16  # Conexões ociosas mantidas no pool
+    SQLITE_LOTE_IDS = 500  # Parâmetros por consulta "id IN (...)"
+    
+    # Vários catálogos: selecionados pelo cabeçalho X-Catalogo ou pelo prefixo
+    # /api/catalogos/<nome>/..., com arquivos <nome>.json (ou .sqlite3) em CATALOGOS_DIR.
+    # O catálogo padrão usa RECURSOS_JSON / RECURSOS_SQLITE
+    CATALOGO_PADRAO = 'padrao'
+    CATALOGO_CABECALHO = 'X-Catalogo'
+    CATALOGOS_DIR = os.environ.get('CATALOGOS_DIR', os.path.join(DADOS_DIR, 'catalogos'))
+    CATALOGOS_MAX = int(os.environ.get('CATALOGOS_MAX', '8'))  # Catálogos carregados ao mesmo tempo
+    CATALOGOS_MEMORIA_MAX_BYTES = int(os.environ.get('CATALOGOS_MEMORIA_MAX_MB', '1024')) * 2**20
+    
+    # Cache em disco dos artefatos derivados do catálogo (CACHE_ARTEFATOS=0 desativa)
+    CACHE_ARTEFATOS_ATIVO = os.environ.get('CACHE_ARTEFATOS', '1') != '0'
+    CACHE_ARTEFATOS_DIR = os.environ.get('CACHE_ARTEFATOS_DIR', os.path.join(DADOS_DIR, 'cache'))
+    CACHE_ARTEFATOS_MANTER = 3  # Chaves (versões do catálogo) mantidas em disco
+    
+    # Perfilamento sob demanda (cProfile + tracemalloc) de /api/recomendacoes.
+    # Requisições com o cabeçalho X-Perfil-Token igual a PERFIL_TOKEN, ou 1 a
+    # cada PERFIL_AMOSTRAGEM (0 desativa), são perfiladas e gravadas em PERFIL_DIR
+    PERFIL_TOKEN = os.environ.get('PERFIL_TOKEN')
+    PERFIL_AMOSTRAGEM = int(os.environ.get('PERFIL_AMOSTRAGEM', '0'))
+    PERFIL_DIR = os.environ.get('PERFIL_DIR', os.path.join(DADOS_DIR, 'perfis'))
+    PERFIL_CABECALHO = 'X-Perfil-Token'
+    PERFIL_TOP_FUNCOES = 40
+    PERFIL_TOP_ALOCACOES = 25
+    PERFIL_MANTER = 200  # Perfis mantidos em disco
     
     # Logging
     LOG_LEVEL = 'INFO'
@@ -69,4 +116,6 @@ class Config:
     
     # Regressão
     REGRESSAO_TIPO = 'linear'  # Tipo de regressão: 'linear', 'ridge', 'lasso'
-    REGRESSAO_TARGET = 'adaptabilidadePedagogica'  # Variável target
\ No newline at end of file
+    REGRESSAO_TARGET = 'adaptabilidadePedagogica'  # Variável target
+    REGRESSAO_ALPHA = 1.0  # Regularização L2 (ridge)
+    REGRESSAO_ALPHA_LASSO = 0.01  # Regularização L1 (lasso)
\ No newline at end of file
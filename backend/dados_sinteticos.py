@@ -0,0 +1,72 @@
+"""
+Dados sintéticos do questionário e do catálogo
+
+Respostas sorteadas de uma distribuição realista do questionário e catálogos
+sintéticos no formato de recursos_base.json, usados pelo teste de carga e
+pelos testes.
+"""
+
+# Opções do questionário do frontend, com pesos aproximando o perfil de uso
+DISTRIBUICAO_RESPOSTAS = {
+    'disciplina': [
+        ('Matemática', 0.20), ('Redação', 0.15), ('Física', 0.12), ('Química', 0.10),
+        ('Biologia', 0.12), ('História', 0.10), ('Geografia', 0.08), ('Multidisciplinar', 0.13)
+    ],
+    'familiaridadeTech': [(0.3, 0.30), (0.6, 0.50), (0.9, 0.20)],
+    'estiloEnsino': [('expositivo', 0.35), ('investigativo', 0.20), ('projetos', 0.20), ('hibrido', 0.25)],
+    'objetivoAula': [('introducao', 0.30), ('pratica', 0.35), ('revisao', 0.25), ('autonomia', 0.10)],
+    'tempoPreparacao': [(0.3, 0.40), (0.6, 0.45), (0.9, 0.15)],
+    'engajamento': [(0.3, 0.30), (0.6, 0.50), (0.9, 0.20)],
+    'conectividade': [(0.2, 0.15), (0.5, 0.40), (0.9, 0.45)],
+    'desempenho': [(0.3, 0.35), (0.6, 0.45), (0.9, 0.20)],
+    'modalidade': [('presencial', 0.70), ('hibrida', 0.20), ('remota', 0.10)],
+    'tempoAula': [(0.4, 0.55), (0.7, 0.35), (1.0, 0.10)],
+    'necessidadeAvaliacao': [(True, 0.45), (False, 0.55)]
+}
+
+AREAS_SINTETICAS = [a for a, _ in DISTRIBUICAO_RESPOSTAS['disciplina']]
+TAGS_SINTETICAS = [
+    'investigativo', 'projetos', 'expositivo', 'hibrido',
+    'introducao', 'pratica', 'revisao', 'autonomia'
+]
+
+
+def sortear_respostas(rng):
+    """Sorteia um questionário completo segundo DISTRIBUICAO_RESPOSTAS"""
+    respostas = {}
+    for campo, opcoes in DISTRIBUICAO_RESPOSTAS.items():
+        valores, pesos = zip(*opcoes)
+        respostas[campo] = rng.choices(valores, weights=pesos)[0]
+    respostas['tamanhoTurma'] = rng.randint(15, 45)
+    respostas['acessoDispositivos'] = rng.choice([['celular'], ['computador'], ['celular', 'computador'], ['nenhum']])
+    respostas['infraestrutura'] = rng.choice([['projetor'], ['laboratorio', 'projetor'], ['wifi', 'projetor'], ['nenhum']])
+    return respostas
+
+
+def gerar_catalogo_sintetico(n, rng):
+    """Gera n recursos no formato de recursos_base.json"""
+    def nota():
+        return round(rng.uniform(0.3, 1.0), 2)
+
+    recursos = []
+    for i in range(1, n + 1):
+        modalidades = [m for m in ('presencial', 'hibrida', 'remota') if rng.random() < 0.85] or ['presencial']
+        recursos.append({
+            'id': i,
+            'nome': f'Recurso Sintético {i}',
+            'area': rng.choice(AREAS_SINTETICAS),
+            'categoria': f'Categoria {rng.randint(1, 40)}',
+            'descricao': 'Recurso gerado para teste de carga',
+            'facilidadeUso': nota(),
+            'engajamentoPotencial': nota(),
+            'adaptabilidadePedagogica': nota(),
+            'requisitosInfraestrutura': nota(),
+            'custoAcessibilidade': rng.choice([0.5, 0.7, 0.8, 1.0]),
+            'tags': rng.sample(TAGS_SINTETICAS, rng.randint(2, 5)),
+            'modalidades': modalidades,
+            'dispositivos': rng.sample(['computador', 'celular'], rng.randint(1, 2)),
+            'avaliacao': rng.random() < 0.5,
+            'offline': rng.random() < 0.3,
+            'referencias': []
+        })
+    return recursos
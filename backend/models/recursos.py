@@ -1,10 +1,102 @@
 """
 Modelo de dados para recursos tecnológicos
 """
+import hashlib
+import itertools
 import json
+import logging
+import os
+import sys
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from contextlib import contextmanager
 from pathlib import Path
 
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Características numéricas usadas pela regressão e pelo agrupamento
+CARACTERISTICAS = [
+    'facilidadeUso',
+    'engajamentoPotencial',
+    'adaptabilidadePedagogica',
+    'requisitosInfraestrutura',
+    'custoAcessibilidade'
+]
+
+CAMPOS_OBRIGATORIOS = [
+    'nome', 'area', 'categoria', 'descricao', *CARACTERISTICAS,
+    'tags', 'modalidades', 'dispositivos', 'avaliacao', 'offline'
+]
+
+# Atributos com índice invertido (campo -> é multivalorado)
+CAMPOS_INDEXADOS = {
+    'area': False,
+    'categoria': False,
+    'modalidades': True,
+    'tags': True,
+    'dispositivos': True,
+    'avaliacao': False,
+    'offline': False
+}
+
+AREA_MULTIDISCIPLINAR = 'Multidisciplinar'
+
+
+def _tamanho_recurso(recurso):
+    """Tamanho aproximado de um RecursoTecnologico e dos seus atributos"""
+    total = sys.getsizeof(recurso) + sys.getsizeof(recurso.__dict__)
+    for valor in recurso.__dict__.values():
+        total += sys.getsizeof(valor)
+        if isinstance(valor, list):
+            total += sum(sys.getsizeof(item) for item in valor)
+    return total
+
+
+class IdsOrdenados:
+    """Conjunto de ids mantido em ordem crescente, com busca binária"""
+
+    __slots__ = ('ids',)
+
+    def __init__(self):
+        self.ids = []
+
+    def add(self, recurso_id):
+        posicao = bisect_left(self.ids, recurso_id)
+        if posicao == len(self.ids) or self.ids[posicao] != recurso_id:
+            self.ids.insert(posicao, recurso_id)
+
+    def discard(self, recurso_id):
+        posicao = bisect_left(self.ids, recurso_id)
+        if posicao < len(self.ids) and self.ids[posicao] == recurso_id:
+            del self.ids[posicao]
+
+    def __contains__(self, recurso_id):
+        posicao = bisect_left(self.ids, recurso_id)
+        return posicao < len(self.ids) and self.ids[posicao] == recurso_id
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def a_partir_de(self, cursor=None):
+        """Itera os ids maiores que o cursor sem percorrer os anteriores"""
+        inicio = 0 if cursor is None else bisect_right(self.ids, cursor)
+        return itertools.islice(self.ids, inicio, None)
+
+
 class RecursoTecnologico:
+    CAMPOS = [
+        'id', 'nome', 'area', 'categoria', 'descricao', *CARACTERISTICAS,
+        'tags', 'modalidades', 'dispositivos', 'avaliacao', 'offline', 'referencias'
+    ]
+
     def __init__(self, dados):
         self.id = dados['id']
         self.nome = dados['nome']
@@ -22,7 +114,7 @@ class RecursoTecnologico:
         self.avaliacao = dados['avaliacao']
         self.offline = dados['offline']
         self.referencias = dados.get('referencias', [])
-    
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -43,21 +135,424 @@ class RecursoTecnologico:
             'referencias': self.referencias
         }
 
+    def vetor_caracteristicas(self):
+        """Retorna as 5 características numéricas na ordem de CARACTERISTICAS"""
+        return [getattr(self, c) for c in CARACTERISTICAS]
+
+    @staticmethod
+    def validar(dados):
+        """Valida os dados de um recurso, lançando ValueError se inválidos"""
+        if not isinstance(dados, dict):
+            raise ValueError('Dados do recurso devem ser um objeto JSON')
+        faltando = [c for c in CAMPOS_OBRIGATORIOS if c not in dados]
+        if faltando:
+            raise ValueError(f"Campos obrigatórios ausentes: {', '.join(faltando)}")
+        for campo in CARACTERISTICAS:
+            valor = dados[campo]
+            if isinstance(valor, bool) or not isinstance(valor, (int, float)) or not 0 <= valor <= 1:
+                raise ValueError(f"Campo '{campo}' deve ser um número entre 0 e 1")
+        for campo in ('nome', 'area', 'categoria', 'descricao'):
+            if not isinstance(dados[campo], str):
+                raise ValueError(f"Campo '{campo}' deve ser um texto")
+        for campo in ('tags', 'modalidades', 'dispositivos', 'referencias'):
+            valor = dados.get(campo, [])
+            if not isinstance(valor, list) or not all(isinstance(v, str) for v in valor):
+                raise ValueError(f"Campo '{campo}' deve ser uma lista de textos")
+        for campo in ('avaliacao', 'offline'):
+            if not isinstance(dados[campo], bool):
+                raise ValueError(f"Campo '{campo}' deve ser booleano")
+
+
+class RepositorioFechado(RuntimeError):
+    """Escrita em um repositório já fechado (catálogo descarregado)"""
+
+
 class RecursosRepository:
-    def __init__(self):
-        self.recursos = self._carregar_recursos()
-    
+    """
+    Catálogo em memória carregado de recursos_base.json.
+
+    Escritas são registradas em um log de alterações (JSONL) ao lado do
+    arquivo base e aplicadas incrementalmente às estruturas em memória
+    (matriz de características, mapa de ids e índices por categoria).
+    O log é compactado no arquivo base em segundo plano.
+    """
+
+    # Escritas só acontecem neste processo (ver RecursosRepositorySQLite)
+    compartilhado = False
+
+    def __init__(self, caminho=None):
+        self.caminho = Path(caminho or Config.RECURSOS_JSON)
+        self.caminho_log = self.caminho.with_suffix('.changelog.jsonl')
+        self._lock = threading.RLock()
+        self._lock_compactacao = threading.Lock()
+        self._compactacao = None
+        self._fechado = False
+        self._observadores = []
+        self.versao = 0
+
+        self.recursos = []
+        self._posicoes = {}
+        self._features = np.zeros((0, len(CARACTERISTICAS)))
+        self.indices = {campo: defaultdict(IdsOrdenados) for campo in CAMPOS_INDEXADOS}
+        self._ids_ordenados = IdsOrdenados()
+        self._proximo_id = 1
+        self._entradas_log = 0
+        # Bytes do log confirmados (cada linha termina em '\n')
+        self._tamanho_log = 0
+
+        for recurso in self._carregar_recursos():
+            self._aplicar_insercao(recurso)
+        self._reaplicar_log()
+
     def _carregar_recursos(self):
-        caminho = Path(__file__).parent.parent / 'data' / 'recursos_base.json'
-        with open(caminho, 'r', encoding='utf-8') as f:
+        with open(self.caminho, 'r', encoding='utf-8') as f:
             dados = json.load(f)
         return [RecursoTecnologico(r) for r in dados]
-    
+
+    def _reaplicar_log(self):
+        """
+        Reaplica sobre o arquivo base as alterações ainda não compactadas.
+        Linhas inválidas são ignoradas. Uma última linha incompleta (queda
+        durante a escrita, ou escrita em andamento em outro processo) também
+        é ignorada, sem alterar o arquivo: quem escreve a corta antes da
+        próxima entrada (ver _registrar_log).
+        """
+        if not self.caminho_log.exists():
+            return
+        with open(self.caminho_log, 'rb') as f:
+            conteudo = f.read()
+        *linhas, incompleta = conteudo.split(b'\n')
+        for numero, linha in enumerate(linhas, 1):
+            # Linhas inválidas também contam: a compactação descarta o log por número de linhas
+            self._entradas_log += 1
+            self._tamanho_log += len(linha) + 1
+            try:
+                entrada = json.loads(linha)
+                if entrada['op'] == 'remover':
+                    if entrada['id'] in self._posicoes:
+                        self._aplicar_remocao(entrada['id'])
+                    continue
+                dados = entrada['recurso']
+                # Validada antes de tocar nas estruturas: uma entrada ruim não deixa estado parcial
+                RecursoTecnologico.validar(dados)
+                if not isinstance(dados['id'], int) or isinstance(dados['id'], bool):
+                    raise ValueError("Campo 'id' deve ser inteiro")
+                recurso = RecursoTecnologico(dados)
+                if recurso.id in self._posicoes:
+                    self._aplicar_atualizacao(recurso)
+                else:
+                    self._aplicar_insercao(recurso)
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Log de alterações: linha {numero} ignorada ({str(e)})")
+
+        if incompleta:
+            logger.warning(f"Log de alterações: última linha incompleta ignorada ({len(incompleta)} bytes)")
+
+    @contextmanager
+    def leitura_consistente(self):
+        """Leituras feitas dentro do bloco veem um mesmo estado; produz a versão dele"""
+        with self._lock:
+            yield self.versao
+
+    def assinatura(self):
+        """
+        Identifica o conteúdo atual sem serializar os recursos: hash do
+        arquivo base e do trecho confirmado do log de alterações
+        """
+        with self._lock:
+            h = hashlib.sha256()
+            with open(self.caminho, 'rb') as f:
+                for bloco in iter(lambda: f.read(2**20), b''):
+                    h.update(bloco)
+            h.update(b'\0')
+            if self._tamanho_log:
+                with open(self.caminho_log, 'rb') as f:
+                    h.update(f.read(self._tamanho_log))
+            return f"json:{h.hexdigest()}"
+
     def obter_todos(self):
-        return self.recursos
-    
+        with self._lock:
+            return list(self.recursos)
+
     def obter_por_id(self, recurso_id):
-        for recurso in self.recursos:
-            if recurso.id == recurso_id:
-                return recurso
-        return None
\ No newline at end of file
+        with self._lock:
+            posicao = self._posicoes.get(recurso_id)
+            return self.recursos[posicao] if posicao is not None else None
+
+    def obter_features(self):
+        """Retorna (ids, matriz n×5 de características) em ordem de posição"""
+        with self._lock:
+            n = len(self.recursos)
+            return [r.id for r in self.recursos], self._features[:n].copy()
+
+    def obter_ids_por(self, campo, valor):
+        """Retorna os ids indexados para campo=valor"""
+        with self._lock:
+            return set(self.indices[campo].get(valor, ()))
+
+    def listar(self, filtros=(), limite=None, cursor=None):
+        """
+        Lista recursos que atendem a todos os filtros [(campo, valor), ...],
+        em ordem de id, a partir do id seguinte ao cursor. Percorre o menor
+        índice envolvido e para ao completar a página.
+        Retorna (recursos, próximo cursor ou None).
+        """
+        with self._lock:
+            indices = [self.indices[campo].get(valor) for campo, valor in filtros]
+            if any(ids is None for ids in indices):
+                return [], None
+            indices = sorted(indices, key=len) or [self._ids_ordenados]
+            base, restantes = indices[0], indices[1:]
+
+            pagina = []
+            for recurso_id in base.a_partir_de(cursor):
+                if all(recurso_id in ids for ids in restantes):
+                    if limite is not None and len(pagina) == limite:
+                        return pagina, pagina[-1].id
+                    pagina.append(self.recursos[self._posicoes[recurso_id]])
+            return pagina, None
+
+    def obter_valores(self, campo):
+        """Retorna os valores distintos indexados para o campo"""
+        with self._lock:
+            return list(self.indices[campo].keys())
+
+    def obter_por_ids(self, ids):
+        """Retorna os recursos dos ids informados, na mesma ordem (None se inexistente)"""
+        with self._lock:
+            posicoes = self._posicoes
+            return [self.recursos[posicoes[i]] if i in posicoes else None for i in ids]
+
+    def contar(self):
+        with self._lock:
+            return len(self.recursos)
+
+    def memoria_estimada(self, amostra=100):
+        """Estimativa em bytes dos recursos, da matriz de características e dos índices"""
+        with self._lock:
+            n = len(self.recursos)
+            amostras = self.recursos[::max(1, n // amostra)]
+            por_recurso = sum(_tamanho_recurso(r) for r in amostras) / len(amostras) if amostras else 0
+            indices = sum(
+                sys.getsizeof(ids.ids) for valores in self.indices.values() for ids in valores.values()
+            )
+            return int(por_recurso * n + self._features.nbytes + indices + sys.getsizeof(self._posicoes))
+
+    def obter_candidatos(self, respostas):
+        """
+        Aplica as regras de elegibilidade pelos índices e retorna
+        (recursos candidatos, matriz de características) em ordem de posição
+        """
+        with self._lock:
+            ids = (self.obter_ids_por('area', respostas.disciplina) |
+                   self.obter_ids_por('area', AREA_MULTIDISCIPLINAR))
+            ids &= self.obter_ids_por('modalidades', respostas.modalidade)
+            if respostas.necessidadeAvaliacao:
+                ids &= self.obter_ids_por('avaliacao', True)
+            if respostas.conectividade < Config.LIMIAR_CONECTIVIDADE_BAIXA:
+                ids &= self.obter_ids_por('offline', True)
+
+            posicoes = np.array(sorted(self._posicoes[i] for i in ids), dtype=int)
+            X = self._features[posicoes]
+            if respostas.familiaridadeTech < Config.LIMIAR_FAMILIARIDADE_BAIXA:
+                mascara = X[:, CARACTERISTICAS.index('facilidadeUso')] >= Config.MIN_FACILIDADE
+                posicoes, X = posicoes[mascara], X[mascara]
+            return [self.recursos[p] for p in posicoes], X
+
+    def registrar_observador(self, callback):
+        """
+        Registra callback(evento, anterior, novo, versao) chamado a cada
+        escrita, com evento em 'inserido', 'atualizado' ou 'removido' e a
+        versão do repositório resultante da escrita
+        """
+        with self._lock:
+            self._observadores.append(callback)
+
+    def inserir(self, dados):
+        """Insere um novo recurso e retorna o objeto criado"""
+        with self._lock:
+            self._verificar_aberto()
+            dados = dict(dados or {})
+            if dados.get('id') is None:
+                dados['id'] = self._proximo_id
+            elif not isinstance(dados['id'], int) or isinstance(dados['id'], bool):
+                raise ValueError("Campo 'id' deve ser inteiro")
+            elif dados['id'] in self._posicoes:
+                raise ValueError(f"Já existe recurso com id {dados['id']}")
+            RecursoTecnologico.validar(dados)
+            recurso = RecursoTecnologico(dados)
+
+            self._registrar_log({'op': 'inserir', 'recurso': recurso.to_dict()})
+            self._aplicar_insercao(recurso)
+            self._notificar('inserido', None, recurso)
+        self._agendar_compactacao()
+        return recurso
+
+    def atualizar(self, recurso_id, dados):
+        """
+        Atualiza um recurso existente (campos ausentes mantêm o valor atual).
+        Retorna None se o recurso não existir.
+        """
+        with self._lock:
+            self._verificar_aberto()
+            anterior = self.obter_por_id(recurso_id)
+            if anterior is None:
+                return None
+            novos_dados = {**anterior.to_dict(), **(dados or {}), 'id': recurso_id}
+            RecursoTecnologico.validar(novos_dados)
+            recurso = RecursoTecnologico(novos_dados)
+
+            self._registrar_log({'op': 'atualizar', 'recurso': recurso.to_dict()})
+            self._aplicar_atualizacao(recurso)
+            self._notificar('atualizado', anterior, recurso)
+        self._agendar_compactacao()
+        return recurso
+
+    def remover(self, recurso_id):
+        """Remove um recurso. Retorna o recurso removido ou None"""
+        with self._lock:
+            self._verificar_aberto()
+            anterior = self.obter_por_id(recurso_id)
+            if anterior is None:
+                return None
+            self._registrar_log({'op': 'remover', 'id': recurso_id})
+            self._aplicar_remocao(recurso_id)
+            self._notificar('removido', anterior, None)
+        self._agendar_compactacao()
+        return anterior
+
+    def _verificar_aberto(self):
+        if self._fechado:
+            raise RepositorioFechado(f"Repositório {self.caminho.name} fechado")
+
+    def fechar(self):
+        """
+        Bloqueia novas escritas e aguarda a que está em andamento e a
+        compactação. Leituras continuam valendo; depois disso outra instância
+        pode abrir os mesmos arquivos sem disputar o log de alterações
+        """
+        with self._lock:
+            self._fechado = True
+        with self._lock_compactacao:
+            compactacao = self._compactacao
+        if compactacao is not None:
+            compactacao.join()
+
+    def _aplicar_insercao(self, recurso):
+        posicao = len(self.recursos)
+        if posicao == len(self._features):
+            # Crescimento geométrico para inserções amortizadas em O(1)
+            capacidade = max(16, 2 * len(self._features))
+            novas = np.zeros((capacidade, len(CARACTERISTICAS)))
+            novas[:posicao] = self._features[:posicao]
+            self._features = novas
+        self._features[posicao] = recurso.vetor_caracteristicas()
+        self.recursos.append(recurso)
+        self._posicoes[recurso.id] = posicao
+        self._ids_ordenados.add(recurso.id)
+        self._indexar(recurso)
+        self._proximo_id = max(self._proximo_id, recurso.id + 1)
+        self.versao += 1
+
+    def _aplicar_atualizacao(self, recurso):
+        posicao = self._posicoes[recurso.id]
+        self._desindexar(self.recursos[posicao])
+        self.recursos[posicao] = recurso
+        self._features[posicao] = recurso.vetor_caracteristicas()
+        self._indexar(recurso)
+        self.versao += 1
+
+    def _aplicar_remocao(self, recurso_id):
+        # Troca com o último elemento para remover em O(1)
+        posicao = self._posicoes.pop(recurso_id)
+        self._ids_ordenados.discard(recurso_id)
+        self._desindexar(self.recursos[posicao])
+        ultima = len(self.recursos) - 1
+        if posicao != ultima:
+            ultimo = self.recursos[ultima]
+            self.recursos[posicao] = ultimo
+            self._features[posicao] = self._features[ultima]
+            self._posicoes[ultimo.id] = posicao
+        self.recursos.pop()
+        self.versao += 1
+
+    def _indexar(self, recurso):
+        for campo, multivalorado in CAMPOS_INDEXADOS.items():
+            valores = getattr(recurso, campo)
+            for valor in (valores if multivalorado else [valores]):
+                self.indices[campo][valor].add(recurso.id)
+
+    def _desindexar(self, recurso):
+        for campo, multivalorado in CAMPOS_INDEXADOS.items():
+            valores = getattr(recurso, campo)
+            for valor in (valores if multivalorado else [valores]):
+                ids = self.indices[campo].get(valor)
+                if ids is not None:
+                    ids.discard(recurso.id)
+                    if not ids:
+                        del self.indices[campo][valor]
+
+    def _notificar(self, evento, anterior, novo):
+        for callback in self._observadores:
+            callback(evento, anterior, novo, self.versao)
+
+    def _registrar_log(self, entrada):
+        """Acrescenta uma entrada ao log de alterações de forma durável"""
+        linha = (json.dumps(entrada, ensure_ascii=False) + '\n').encode('utf-8')
+        with open(self.caminho_log, 'ab') as f:
+            if f.tell() > self._tamanho_log:
+                # Resto de uma escrita que falhou (não confirmada): a entrada começa em linha nova
+                f.truncate(self._tamanho_log)
+            f.write(linha)
+            f.flush()
+            os.fsync(f.fileno())
+        self._tamanho_log += len(linha)
+        self._entradas_log += 1
+
+    def _agendar_compactacao(self):
+        """Dispara a compactação em segundo plano ao atingir o limite do log"""
+        if self._entradas_log < Config.CHANGELOG_LIMITE_COMPACTACAO:
+            return
+        with self._lock_compactacao:
+            if self._fechado or (self._compactacao is not None and self._compactacao.is_alive()):
+                return
+            self._compactacao = threading.Thread(
+                target=self.compactar, name='compactacao-recursos', daemon=True
+            )
+            self._compactacao.start()
+
+    def compactar(self):
+        """
+        Grava o estado atual no arquivo base e descarta do log as entradas
+        já incorporadas. A reaplicação do log é idempotente, então uma queda
+        entre as duas etapas não perde nem duplica alterações.
+        """
+        with self._lock:
+            recursos = list(self.recursos)
+            aplicadas = self._entradas_log
+        if not aplicadas:
+            return
+
+        # Recursos são imutáveis após criados; a serialização ocorre fora do lock
+        self._gravar_atomico(
+            self.caminho,
+            json.dumps([r.to_dict() for r in recursos], ensure_ascii=False, indent=2) + '\n'
+        )
+
+        with self._lock:
+            with open(self.caminho_log, 'rb') as f:
+                # Só o trecho confirmado: uma última linha incompleta não é entrada do log
+                linhas = f.read(self._tamanho_log).split(b'\n')[:-1]
+            restantes = b''.join(l + b'\n' for l in linhas[aplicadas:]).decode('utf-8', errors='replace')
+            self._gravar_atomico(self.caminho_log, restantes)
+            self._entradas_log -= aplicadas
+            self._tamanho_log = len(restantes.encode('utf-8'))
+
+    @staticmethod
+    def _gravar_atomico(caminho, conteudo):
+        temporario = caminho.with_name(caminho.name + '.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
@@ -0,0 +1,456 @@
+"""
+Repositório de recursos tecnológicos em SQLite
+Alternativa ao catálogo JSON em memória para catálogos grandes ou
+compartilhados entre processos
+"""
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from config import Config
+from models.recursos import (
+    AREA_MULTIDISCIPLINAR, CAMPOS_INDEXADOS, CARACTERISTICAS, RecursoTecnologico
+)
+
+CAMPOS_LISTA = ['tags', 'modalidades', 'dispositivos', 'referencias']
+
+# Campos multivalorados indexados em tabelas associativas: campo -> (tabela, coluna)
+TABELAS_MULTIVALORADAS = {
+    'modalidades': ('recurso_modalidades', 'modalidade'),
+    'tags': ('recurso_tags', 'tag'),
+    'dispositivos': ('recurso_dispositivos', 'dispositivo')
+}
+VERSAO_ESQUEMA = 2
+
+COLUNAS = [
+    'id', 'nome', 'area', 'categoria', 'descricao', *CARACTERISTICAS,
+    'avaliacao', 'offline', *CAMPOS_LISTA
+]
+
+ESQUEMA_ASSOCIATIVAS = ''.join(
+    f"""
+CREATE TABLE IF NOT EXISTS {tabela} (
+    {coluna} TEXT NOT NULL,
+    recurso_id INTEGER NOT NULL REFERENCES recursos(id) ON DELETE CASCADE,
+    PRIMARY KEY ({coluna}, recurso_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_{tabela}_recurso ON {tabela}(recurso_id);"""
+    for tabela, coluna in TABELAS_MULTIVALORADAS.values()
+)
+
+ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS recursos (
+    id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL,
+    area TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    descricao TEXT NOT NULL,
+    {', '.join(f'{c} REAL NOT NULL' for c in CARACTERISTICAS)},
+    avaliacao INTEGER NOT NULL,
+    offline INTEGER NOT NULL,
+    {', '.join(f'{c} TEXT NOT NULL' for c in CAMPOS_LISTA)}
+);
+{ESQUEMA_ASSOCIATIVAS}
+CREATE TABLE IF NOT EXISTS metadados (
+    chave TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_recursos_area ON recursos(area);
+CREATE INDEX IF NOT EXISTS idx_recursos_categoria ON recursos(categoria);
+CREATE INDEX IF NOT EXISTS idx_recursos_avaliacao ON recursos(avaliacao);
+CREATE INDEX IF NOT EXISTS idx_recursos_offline ON recursos(offline);
+INSERT OR IGNORE INTO metadados (chave, valor) VALUES ('versao', 0);
+INSERT OR IGNORE INTO metadados (chave, valor) VALUES ('instancia', random());
+"""
+
+SQL_SELECT = f"SELECT {', '.join(COLUNAS)} FROM recursos"
+SQL_FEATURES = f"SELECT id, {', '.join(CARACTERISTICAS)} FROM recursos"
+# Com id NULL, o SQLite atribui o próximo id dentro da transação de escrita
+SQL_INSERIR = (
+    f"INSERT INTO recursos ({', '.join(COLUNAS)}) "
+    f"VALUES ({', '.join('?' for _ in COLUNAS)})"
+)
+SQL_ATUALIZAR = (
+    f"UPDATE recursos SET {', '.join(f'{c} = ?' for c in COLUNAS[1:])} WHERE id = ?"
+)
+
+
+class RecursosRepositorySQLite:
+    """
+    Catálogo persistido em SQLite (modo WAL), com um pool de conexões: cada
+    thread usa uma conexão exclusiva durante a operação e a devolve ao final.
+
+    Expõe a mesma interface de RecursosRepository; as consultas usam SQL
+    fixo (reaproveitado pelo cache de statements do sqlite3) e a pré-filtragem
+    de elegibilidade é resolvida pelos índices do banco, trazendo para a
+    memória apenas as linhas candidatas.
+    """
+
+    # Outros processos podem escrever no mesmo arquivo: a versão em
+    # metadados é a referência para detectar alterações externas
+    compartilhado = True
+
+    def __init__(self, caminho=None, caminho_json=None):
+        self.caminho = Path(caminho or Config.RECURSOS_SQLITE)
+        self._local = threading.local()
+        self._pool = queue.LifoQueue(maxsize=Config.SQLITE_POOL_MAX)
+        self._lock = threading.RLock()
+        self._observadores = []
+
+        with self._conexao() as conexao:
+            conexao.executescript(ESQUEMA)
+            self._migrar(conexao)
+        if self.contar() == 0:
+            origem = Path(caminho_json or Config.RECURSOS_JSON)
+            if origem.exists():
+                self.importar_json(origem)
+
+    def _migrar(self, conexao):
+        """Preenche as tabelas associativas criadas após a versão 1 do esquema"""
+        versao = conexao.execute('PRAGMA user_version').fetchone()[0]
+        if versao >= VERSAO_ESQUEMA:
+            return
+        with conexao:
+            for campo, (tabela, coluna) in TABELAS_MULTIVALORADAS.items():
+                conexao.execute(
+                    f"INSERT OR IGNORE INTO {tabela} ({coluna}, recurso_id) "
+                    f"SELECT j.value, r.id FROM recursos r, json_each(r.{campo}) j"
+                )
+        conexao.execute(f'PRAGMA user_version = {VERSAO_ESQUEMA}')
+
+    def _abrir_conexao(self):
+        conexao = sqlite3.connect(
+            self.caminho, timeout=30, check_same_thread=False,
+            cached_statements=Config.SQLITE_CACHE_STATEMENTS
+        )
+        conexao.execute('PRAGMA journal_mode=WAL')
+        conexao.execute('PRAGMA synchronous=NORMAL')
+        conexao.execute('PRAGMA foreign_keys=ON')
+        return conexao
+
+    @contextmanager
+    def _conexao(self):
+        """Empresta uma conexão do pool à thread atual (reentrante)"""
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is not None:
+            yield conexao
+            return
+        try:
+            conexao = self._pool.get_nowait()
+        except queue.Empty:
+            conexao = self._abrir_conexao()
+        self._local.conexao = conexao
+        try:
+            yield conexao
+        finally:
+            self._local.conexao = None
+            try:
+                self._pool.put_nowait(conexao)
+            except queue.Full:
+                conexao.close()
+
+    @contextmanager
+    def _transacao(self):
+        """
+        Transação de escrita iniciada com BEGIN IMMEDIATE: a leitura do estado
+        anterior e a escrita ficam serializadas também entre processos
+        """
+        with self._conexao() as conexao:
+            conexao.execute('BEGIN IMMEDIATE')
+            try:
+                yield conexao
+            except BaseException:
+                conexao.rollback()
+                raise
+            conexao.commit()
+
+    def memoria_estimada(self):
+        """Os recursos ficam em disco; o cache de páginas do SQLite não é contabilizado"""
+        return 0
+
+    def fechar(self):
+        """Fecha as conexões ociosas do pool"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def importar_json(self, caminho):
+        """Carrega um arquivo no formato de recursos_base.json"""
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        with self._transacao() as conexao:
+            for item in dados:
+                self._inserir_linha(conexao, RecursoTecnologico(item).to_dict())
+            self._incrementar_versao(conexao)
+
+    @staticmethod
+    def _para_recurso(linha):
+        dados = dict(zip(COLUNAS, linha))
+        dados['avaliacao'] = bool(dados['avaliacao'])
+        dados['offline'] = bool(dados['offline'])
+        for campo in CAMPOS_LISTA:
+            dados[campo] = json.loads(dados[campo])
+        return RecursoTecnologico(dados)
+
+    @staticmethod
+    def _valores(dados):
+        """Valores das COLUNAS exceto id, na ordem do esquema"""
+        valores = [dados[c] for c in COLUNAS[1:] if c not in CAMPOS_LISTA]
+        valores += [json.dumps(dados[c], ensure_ascii=False) for c in CAMPOS_LISTA]
+        return [int(v) if isinstance(v, bool) else v for v in valores]
+
+    def _inserir_linha(self, conexao, dados):
+        """Insere a linha (id None = atribuído pelo SQLite) e retorna o id gravado"""
+        try:
+            cursor = conexao.execute(SQL_INSERIR, [dados['id'], *self._valores(dados)])
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Já existe recurso com id {dados['id']}")
+        self._gravar_associativas(conexao, cursor.lastrowid, dados)
+        return cursor.lastrowid
+
+    @staticmethod
+    def _gravar_associativas(conexao, recurso_id, dados):
+        for campo, (tabela, coluna) in TABELAS_MULTIVALORADAS.items():
+            conexao.execute(f'DELETE FROM {tabela} WHERE recurso_id = ?', (recurso_id,))
+            conexao.executemany(
+                f'INSERT OR IGNORE INTO {tabela} ({coluna}, recurso_id) VALUES (?, ?)',
+                [(valor, recurso_id) for valor in dados[campo]]
+            )
+
+    @staticmethod
+    def _incrementar_versao(conexao):
+        """Incrementa a versão compartilhada e retorna o novo valor (dentro da transação)"""
+        conexao.execute("UPDATE metadados SET valor = valor + 1 WHERE chave = 'versao'")
+        return conexao.execute("SELECT valor FROM metadados WHERE chave = 'versao'").fetchone()[0]
+
+    @property
+    def versao(self):
+        """Versão do catálogo, compartilhada entre processos"""
+        with self._conexao() as conexao:
+            linha = conexao.execute(
+                "SELECT valor FROM metadados WHERE chave = 'versao'"
+            ).fetchone()
+        return linha[0] if linha else 0
+
+    @contextmanager
+    def leitura_consistente(self):
+        """
+        Leituras feitas dentro do bloco (na mesma thread) veem um mesmo estado
+        do banco, por uma transação de leitura no WAL; produz a versão dele
+        """
+        with self._conexao() as conexao:
+            if conexao.in_transaction:
+                yield self.versao
+                return
+            conexao.execute('BEGIN')
+            try:
+                yield self.versao
+            finally:
+                conexao.rollback()
+
+    def assinatura(self):
+        """
+        Identifica o conteúdo atual sem lê-lo: o banco (número aleatório
+        gravado na criação) e a versão, incrementada a cada escrita
+        """
+        with self._conexao() as conexao:
+            metadados = dict(conexao.execute(
+                "SELECT chave, valor FROM metadados WHERE chave IN ('instancia', 'versao')"
+            ))
+        return f"sqlite:{metadados['instancia']}:{metadados['versao']}"
+
+    def obter_todos(self):
+        with self._conexao() as conexao:
+            linhas = conexao.execute(f"{SQL_SELECT} ORDER BY id").fetchall()
+        return [self._para_recurso(l) for l in linhas]
+
+    def obter_por_id(self, recurso_id):
+        with self._conexao() as conexao:
+            linha = conexao.execute(f"{SQL_SELECT} WHERE id = ?", (recurso_id,)).fetchone()
+        return self._para_recurso(linha) if linha else None
+
+    def obter_features(self):
+        """Retorna (ids, matriz n×5 de características) lendo apenas essas colunas"""
+        with self._conexao() as conexao:
+            linhas = conexao.execute(f"{SQL_FEATURES} ORDER BY id").fetchall()
+        X = np.array([l[1:] for l in linhas], dtype=float).reshape(-1, len(CARACTERISTICAS))
+        return [l[0] for l in linhas], X
+
+    def obter_ids_por(self, campo, valor):
+        """Retorna os ids para campo=valor usando o índice correspondente"""
+        if campo not in CAMPOS_INDEXADOS:
+            raise KeyError(campo)
+        if campo in TABELAS_MULTIVALORADAS:
+            tabela, coluna = TABELAS_MULTIVALORADAS[campo]
+            sql = f'SELECT recurso_id FROM {tabela} WHERE {coluna} = ?'
+        else:
+            sql = f'SELECT id FROM recursos WHERE {campo} = ?'
+        valor = int(valor) if isinstance(valor, bool) else valor
+        with self._conexao() as conexao:
+            return {l[0] for l in conexao.execute(sql, (valor,))}
+
+    def obter_valores(self, campo):
+        """Retorna os valores distintos do campo"""
+        if campo not in CAMPOS_INDEXADOS:
+            raise KeyError(campo)
+        if campo in TABELAS_MULTIVALORADAS:
+            tabela, coluna = TABELAS_MULTIVALORADAS[campo]
+            sql = f'SELECT DISTINCT {coluna} FROM {tabela}'
+        else:
+            sql = f'SELECT DISTINCT {campo} FROM recursos'
+        with self._conexao() as conexao:
+            valores = [l[0] for l in conexao.execute(sql)]
+        if campo in ('avaliacao', 'offline'):
+            return [bool(v) for v in valores]
+        return valores
+
+    def listar(self, filtros=(), limite=None, cursor=None):
+        """
+        Lista recursos que atendem a todos os filtros [(campo, valor), ...],
+        em ordem de id, a partir do id seguinte ao cursor.
+        Retorna (recursos, próximo cursor ou None).
+        """
+        condicoes = []
+        parametros = []
+        if cursor is not None:
+            condicoes.append('id > ?')
+            parametros.append(cursor)
+        for campo, valor in filtros:
+            if campo not in CAMPOS_INDEXADOS:
+                raise KeyError(campo)
+            if campo in TABELAS_MULTIVALORADAS:
+                tabela, coluna = TABELAS_MULTIVALORADAS[campo]
+                condicoes.append(f'id IN (SELECT recurso_id FROM {tabela} WHERE {coluna} = ?)')
+            else:
+                condicoes.append(f'{campo} = ?')
+            parametros.append(int(valor) if isinstance(valor, bool) else valor)
+
+        sql = SQL_SELECT
+        if condicoes:
+            sql += f" WHERE {' AND '.join(condicoes)}"
+        sql += ' ORDER BY id'
+        if limite is not None:
+            sql += ' LIMIT ?'
+            parametros.append(limite + 1)
+
+        with self._conexao() as conexao:
+            linhas = conexao.execute(sql, parametros).fetchall()
+        recursos = [self._para_recurso(l) for l in linhas]
+        if limite is not None and len(recursos) > limite:
+            return recursos[:limite], recursos[limite - 1].id
+        return recursos, None
+
+    def obter_por_ids(self, ids):
+        """Retorna os recursos dos ids informados, na mesma ordem (None se inexistente)"""
+        ids = [int(i) for i in ids]
+        encontrados = {}
+        with self._conexao() as conexao:
+            for inicio in range(0, len(ids), Config.SQLITE_LOTE_IDS):
+                lote = ids[inicio:inicio + Config.SQLITE_LOTE_IDS]
+                sql = f"{SQL_SELECT} WHERE id IN ({', '.join('?' for _ in lote)})"
+                for linha in conexao.execute(sql, lote):
+                    encontrados[linha[0]] = self._para_recurso(linha)
+        return [encontrados.get(i) for i in ids]
+
+    def contar(self):
+        with self._conexao() as conexao:
+            return conexao.execute('SELECT COUNT(*) FROM recursos').fetchone()[0]
+
+    def obter_candidatos(self, respostas):
+        """
+        Aplica as regras de elegibilidade como consulta indexada e retorna
+        (recursos candidatos, matriz de características) ordenados por id
+        """
+        condicoes = ['m.modalidade = ?', 'r.area IN (?, ?)']
+        parametros = [respostas.modalidade, respostas.disciplina, AREA_MULTIDISCIPLINAR]
+        if respostas.necessidadeAvaliacao:
+            condicoes.append('r.avaliacao = 1')
+        if respostas.conectividade < Config.LIMIAR_CONECTIVIDADE_BAIXA:
+            condicoes.append('r.offline = 1')
+        if respostas.familiaridadeTech < Config.LIMIAR_FAMILIARIDADE_BAIXA:
+            condicoes.append('r.facilidadeUso >= ?')
+            parametros.append(Config.MIN_FACILIDADE)
+
+        colunas = ', '.join(f'r.{c}' for c in COLUNAS)
+        sql = (
+            f"SELECT {colunas} FROM recurso_modalidades m "
+            f"JOIN recursos r ON r.id = m.recurso_id "
+            f"WHERE {' AND '.join(condicoes)} ORDER BY r.id"
+        )
+        with self._conexao() as conexao:
+            linhas = conexao.execute(sql, parametros).fetchall()
+        inicio = COLUNAS.index(CARACTERISTICAS[0])
+        X = np.array(
+            [l[inicio:inicio + len(CARACTERISTICAS)] for l in linhas], dtype=float
+        ).reshape(-1, len(CARACTERISTICAS))
+        return [self._para_recurso(l) for l in linhas], X
+
+    def registrar_observador(self, callback):
+        """
+        Registra callback(evento, anterior, novo, versao) chamado a cada
+        escrita feita por este processo, com evento em 'inserido', 'atualizado'
+        ou 'removido' e a versão compartilhada gravada pela escrita. Escritas
+        de outros processos não notificam: ver CatalogoRecursos.sincronizar
+        """
+        with self._lock:
+            self._observadores.append(callback)
+
+    def inserir(self, dados):
+        """Insere um novo recurso e retorna o objeto criado (id atribuído pelo SQLite se ausente)"""
+        with self._lock:
+            dados = dict(dados or {})
+            if dados.get('id') is not None and (
+                not isinstance(dados['id'], int) or isinstance(dados['id'], bool)
+            ):
+                raise ValueError("Campo 'id' deve ser inteiro")
+            RecursoTecnologico.validar(dados)
+            dados = RecursoTecnologico({'id': None, **dados}).to_dict()
+            with self._transacao() as conexao:
+                dados['id'] = self._inserir_linha(conexao, dados)
+                versao = self._incrementar_versao(conexao)
+            recurso = RecursoTecnologico(dados)
+            self._notificar('inserido', None, recurso, versao)
+        return recurso
+
+    def atualizar(self, recurso_id, dados):
+        """
+        Atualiza um recurso existente (campos ausentes mantêm o valor atual).
+        Retorna None se o recurso não existir.
+        """
+        with self._lock:
+            with self._transacao() as conexao:
+                anterior = self.obter_por_id(recurso_id)
+                if anterior is None:
+                    return None
+                novos_dados = {**anterior.to_dict(), **(dados or {}), 'id': recurso_id}
+                RecursoTecnologico.validar(novos_dados)
+                recurso = RecursoTecnologico(novos_dados)
+                dados = recurso.to_dict()
+                conexao.execute(SQL_ATUALIZAR, [*self._valores(dados), recurso_id])
+                self._gravar_associativas(conexao, recurso_id, dados)
+                versao = self._incrementar_versao(conexao)
+            self._notificar('atualizado', anterior, recurso, versao)
+        return recurso
+
+    def remover(self, recurso_id):
+        """Remove um recurso. Retorna o recurso removido ou None"""
+        with self._lock:
+            with self._transacao() as conexao:
+                anterior = self.obter_por_id(recurso_id)
+                if anterior is None:
+                    return None
+                conexao.execute('DELETE FROM recursos WHERE id = ?', (recurso_id,))
+                versao = self._incrementar_versao(conexao)
+            self._notificar('removido', anterior, None, versao)
+        return anterior
+
+    def _notificar(self, evento, anterior, novo, versao):
+        for callback in self._observadores:
+            callback(evento, anterior, novo, versao)
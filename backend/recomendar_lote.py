@@ -0,0 +1,280 @@
+"""
+Processamento em lote de respostas do questionário (linha de comando)
+
+Lê respostas exportadas em CSV ou JSONL de forma incremental, distribui
+lotes entre processos (cada um carrega o catálogo uma única vez) e grava
+as top-k recomendações de cada linha em CSV ou JSONL, na ordem de entrada.
+A elegibilidade segue CLASSIFICACAO_MODO (ou --modo), como na API.
+
+Uso:
+    python recomendar_lote.py respostas.csv -o recomendacoes.jsonl -k 10 -p 4
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from config import Config
+from models.questionario import RespostasQuestionario
+from services.motor import SnapshotDesatualizado
+from services.recomendacao import SistemaRecomendacao
+
+CAMPOS_LISTA = ('acessoDispositivos', 'infraestrutura')
+CAMPOS_SAIDA_CSV = ['linha', 'identificador', 'posicao', 'recurso_id', 'nome', 'scoreFinal', 'cluster_id', 'erro']
+
+# Estado de cada processo de trabalho (carregado em _inicializar_worker)
+_motor = {}
+
+
+def _inicializar_worker(backend, caminho, modo):
+    """Carrega repositório, regressão e visões uma vez por processo"""
+    import logging
+    logging.disable(logging.INFO)
+
+    from models.recursos import RecursosRepository
+    from models.recursos_sqlite import RecursosRepositorySQLite
+    from services.catalogo import CatalogoRecursos
+
+    if backend == 'sqlite':
+        repositorio = RecursosRepositorySQLite(caminho)
+    else:
+        repositorio = RecursosRepository(caminho)
+    # Sem thread de fundo: cada chave é materializada na primeira vez que aparece
+    catalogo = CatalogoRecursos(repositorio, iniciar_visoes=False)
+    _motor['catalogo'] = catalogo
+    _motor['modo'] = modo
+
+
+def _normalizar_linha(dados):
+    """Converte os valores textuais de uma linha CSV para os tipos do questionário"""
+    normalizados = {}
+    for campo, valor in dados.items():
+        if valor is None or valor == '':
+            continue
+        if campo in CAMPOS_LISTA:
+            valor = json.loads(valor) if valor.startswith('[') else [v.strip() for v in valor.split(';') if v.strip()]
+        elif campo == 'necessidadeAvaliacao':
+            valor = valor.strip().lower() in ('1', 'true', 'sim', 's', 'yes')
+        normalizados[campo] = valor
+    return normalizados
+
+
+def _interpretar_linha(bruta):
+    """Linha JSONL (texto) ou CSV (dict de textos) -> dados do questionário"""
+    dados = json.loads(bruta) if isinstance(bruta, str) else _normalizar_linha(bruta)
+    if not isinstance(dados, dict):
+        raise ValueError(f'Linha deve ser um objeto JSON, não {type(dados).__name__}')
+    return dados
+
+
+def _ler_catalogo(catalogo):
+    """Motor e recursos do catálogo lidos na mesma versão (modo 'arvore')"""
+    def ler(motor):
+        with catalogo.repositorio.leitura_consistente() as versao:
+            if versao != motor.versao:
+                raise SnapshotDesatualizado(motor.versao, versao)
+            return motor, catalogo.repositorio.obter_todos()
+    return catalogo.consultar(ler)
+
+
+def _recomendar_regras(catalogo, respostas, top_k):
+    """Top-k da visão materializada; visão e recursos lidos na mesma versão"""
+    visao, recursos = catalogo.consultar(
+        lambda motor: motor.visoes.obter_recursos(respostas, motor, top_k)
+    )
+    return [
+        {
+            'id': recurso.id,
+            'nome': recurso.nome,
+            'scoreFinal': float(score),
+            'cluster_id': int(cluster_id)
+        }
+        for recurso, score, cluster_id in zip(recursos, visao.scores, visao.clusters)
+    ]
+
+
+def _recomendar_arvore(motor, recursos, respostas, top_k):
+    """Top-k do mesmo pipeline da API (árvore de decisão e K-Means por resposta)"""
+    sistema = SistemaRecomendacao(
+        respostas, recursos, pesos=motor.pesos, metricas_regressao=motor.metricas_regressao
+    )
+    return [
+        {
+            'id': item['id'],
+            'nome': item['nome'],
+            'scoreFinal': item['scoreFinal'],
+            'cluster_id': item['cluster_id']
+        }
+        for item in sistema.gerar_recomendacoes()['ranking'][:top_k]
+    ]
+
+
+def _processar_lote(lote, top_k, campo_id):
+    """
+    Gera as top-k recomendações de cada linha do lote. Linhas que não podem
+    ser interpretadas geram um resultado com o erro, sem interromper o lote
+    """
+    catalogo = _motor['catalogo']
+    catalogo.sincronizar()
+    if _motor['modo'] == 'arvore':
+        # A árvore é treinada sobre o catálogo inteiro: lido uma vez por lote
+        motor, recursos = _ler_catalogo(catalogo)
+    resultados = []
+    for numero, bruta in lote:
+        identificador = bruta.get(campo_id) if campo_id and isinstance(bruta, dict) else None
+        try:
+            dados = _interpretar_linha(bruta)
+            identificador = dados.get(campo_id) if campo_id else None
+            respostas = RespostasQuestionario(dados)
+            if _motor['modo'] == 'arvore':
+                recomendacoes = _recomendar_arvore(motor, recursos, respostas, top_k)
+            else:
+                recomendacoes = _recomendar_regras(catalogo, respostas, top_k)
+            resultados.append({'linha': numero, 'identificador': identificador, 'recomendacoes': recomendacoes})
+        except (ValueError, TypeError, AttributeError) as e:
+            resultados.append({'linha': numero, 'identificador': identificador, 'erro': str(e)})
+    return resultados
+
+
+def ler_respostas(caminho, formato):
+    """
+    Itera (número da linha, linha bruta) sem carregar o arquivo inteiro.
+    A interpretação fica nos processos de trabalho, onde um erro afeta só a linha
+    """
+    with open(caminho, 'r', encoding='utf-8-sig', newline='') as f:
+        if formato == 'csv':
+            yield from enumerate(csv.DictReader(f), start=1)
+        else:
+            for numero, linha in enumerate(f, start=1):
+                if linha.strip():
+                    yield numero, linha
+
+
+class EscritorResultados:
+    """Grava resultados em CSV (uma linha por recomendação) ou JSONL"""
+
+    def __init__(self, arquivo, formato):
+        self.arquivo = arquivo
+        self.formato = formato
+        if formato == 'csv':
+            self.csv = csv.DictWriter(arquivo, fieldnames=CAMPOS_SAIDA_CSV)
+            self.csv.writeheader()
+
+    def escrever(self, resultado):
+        if self.formato == 'jsonl':
+            self.arquivo.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+            return
+        base = {'linha': resultado['linha'], 'identificador': resultado['identificador']}
+        if 'erro' in resultado:
+            self.csv.writerow({**base, 'erro': resultado['erro']})
+            return
+        for posicao, rec in enumerate(resultado['recomendacoes'], start=1):
+            self.csv.writerow({
+                **base, 'posicao': posicao, 'recurso_id': rec['id'], 'nome': rec['nome'],
+                'scoreFinal': rec['scoreFinal'], 'cluster_id': rec['cluster_id']
+            })
+
+
+def _lotes(linhas, tamanho):
+    iterador = iter(linhas)
+    while True:
+        lote = list(itertools.islice(iterador, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+def _formato(caminho, explicito):
+    if explicito:
+        return explicito
+    return 'csv' if str(caminho).lower().endswith('.csv') else 'jsonl'
+
+
+def processar(args):
+    formato_entrada = _formato(args.entrada, args.formato_entrada)
+    formato_saida = _formato(args.saida, args.formato_saida)
+    caminho_catalogo = args.catalogo or (
+        Config.RECURSOS_SQLITE if args.backend == 'sqlite' else Config.RECURSOS_JSON
+    )
+    lotes = _lotes(ler_respostas(args.entrada, formato_entrada), args.tamanho_lote)
+
+    total = erros = 0
+    inicio = ultimo_relatorio = time.perf_counter()
+
+    def registrar(resultados):
+        nonlocal total, erros, ultimo_relatorio
+        for resultado in resultados:
+            escritor.escrever(resultado)
+            erros += 'erro' in resultado
+        total += len(resultados)
+        agora = time.perf_counter()
+        if not args.silencioso and agora - ultimo_relatorio >= args.intervalo_progresso:
+            ultimo_relatorio = agora
+            print(f"{total} linhas processadas ({total / (agora - inicio):.0f} linhas/s, "
+                  f"{erros} com erro)", file=sys.stderr, flush=True)
+
+    with open(args.saida, 'w', encoding='utf-8', newline='') as saida:
+        escritor = EscritorResultados(saida, formato_saida)
+
+        if args.processos == 1:
+            _inicializar_worker(args.backend, caminho_catalogo, args.modo)
+            for lote in lotes:
+                registrar(_processar_lote(lote, args.top_k, args.campo_id))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=args.processos, initializer=_inicializar_worker,
+                initargs=(args.backend, caminho_catalogo, args.modo)
+            ) as executor:
+                # Janela limitada de lotes em voo: memória constante e saída em ordem
+                pendentes = deque()
+                for lote in lotes:
+                    pendentes.append(executor.submit(_processar_lote, lote, args.top_k, args.campo_id))
+                    if len(pendentes) >= args.processos * args.lotes_por_processo:
+                        registrar(pendentes.popleft().result())
+                while pendentes:
+                    registrar(pendentes.popleft().result())
+
+    duracao = time.perf_counter() - inicio
+    if not args.silencioso:
+        print(f"Concluído: {total} linhas em {duracao:.1f}s "
+              f"({total / max(duracao, 1e-9):.0f} linhas/s, {erros} com erro)", file=sys.stderr)
+    return total, erros
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        description='Gera recomendações em lote a partir de respostas do questionário (CSV ou JSONL)'
+    )
+    parser.add_argument('entrada', help='Arquivo de respostas (.csv ou .jsonl)')
+    parser.add_argument('-o', '--saida', required=True, help='Arquivo de saída (.csv ou .jsonl)')
+    parser.add_argument('-k', '--top-k', type=int, default=10, help='Recomendações por linha (padrão: 10)')
+    parser.add_argument('-p', '--processos', type=int, default=os.cpu_count() or 1,
+                        help='Processos de trabalho (padrão: número de CPUs)')
+    parser.add_argument('--tamanho-lote', type=int, default=1000, help='Linhas por lote (padrão: 1000)')
+    parser.add_argument('--lotes-por-processo', type=int, default=2,
+                        help='Lotes em voo por processo, limita o uso de memória (padrão: 2)')
+    parser.add_argument('--formato-entrada', choices=['csv', 'jsonl'], help='Padrão: pela extensão')
+    parser.add_argument('--formato-saida', choices=['csv', 'jsonl'], help='Padrão: pela extensão')
+    parser.add_argument('--campo-id', help='Coluna de entrada copiada para a saída como identificador')
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default=Config.REPOSITORIO_BACKEND,
+                        help='Repositório do catálogo')
+    parser.add_argument('--catalogo', help='Caminho do catálogo (padrão: o da configuração)')
+    parser.add_argument('--modo', choices=['arvore', 'regras'], default=Config.CLASSIFICACAO_MODO,
+                        help='Elegibilidade pela árvore de decisão ou pelas visões das regras '
+                             '(padrão: CLASSIFICACAO_MODO)')
+    parser.add_argument('--intervalo-progresso', type=float, default=5.0,
+                        help='Segundos entre relatórios de progresso (padrão: 5)')
+    parser.add_argument('-q', '--silencioso', action='store_true', help='Não exibe progresso')
+    return parser
+
+
+if __name__ == '__main__':
+    argumentos = criar_parser().parse_args()
+    if argumentos.top_k < 1 or argumentos.processos < 1 or argumentos.tamanho_lote < 1:
+        criar_parser().error('top-k, processos e tamanho-lote devem ser positivos')
+    processar(argumentos)
@@ -7,6 +7,7 @@ from sklearn.cluster import KMeans
 from sklearn.metrics import silhouette_score
 from sklearn.decomposition import PCA
 from collections import Counter
+from config import Config
 import numpy as np
 
 class AgrupadorSimilaridade:
@@ -44,7 +45,7 @@ class AgrupadorSimilaridade:
         self.labels_recursos = self.modelo_kmeans.fit_predict(X_scaled)
         self.centroides = self.modelo_kmeans.cluster_centers_
         
-        if n_clusters > 1 and len(np.unique(self.labels_recursos)) > 1:
+        if 1 < len(np.unique(self.labels_recursos)) < len(X_scaled):
             silhouette = silhouette_score(X_scaled, self.labels_recursos)
         else:
             silhouette = 0.0
@@ -151,33 +152,146 @@ class AgrupadorSimilaridade:
     
     def _construir_vetor_professor(self):
         """Constrói vetor 5D do professor"""
-        return np.array([
-            self.respostas.familiaridadeTech,
-            self.respostas.tempoPreparacao,
-            self.respostas.conectividade,
-            self.respostas.engajamento,
-            self.respostas.desempenho
-        ])
+        return vetor_professor(self.respostas)
     
     def _construir_vetor_recurso(self, recurso):
         """Constrói vetor 5D do recurso"""
-        return np.array([
-            recurso.facilidadeUso,
-            recurso.adaptabilidadePedagogica,
-            recurso.requisitosInfraestrutura,
-            recurso.engajamentoPotencial,
-            recurso.custoAcessibilidade
-        ])
+        return vetor_recurso(recurso)
     
     def obter_distancias_detalhadas(self, recurso):
         """Retorna distâncias por dimensão"""
-        vetor_prof = self._construir_vetor_professor()
-        vetor_rec = self._construir_vetor_recurso(recurso)
-        
+        return distancias_detalhadas(self._construir_vetor_professor(), vetor_recurso(recurso))
+
+
+def vetor_professor(respostas):
+    """Vetor 5D do professor, pareado dimensão a dimensão com vetor_recurso"""
+    return np.array([
+        respostas.familiaridadeTech,
+        respostas.tempoPreparacao,
+        respostas.conectividade,
+        respostas.engajamento,
+        respostas.desempenho
+    ])
+
+
+def vetor_recurso(recurso):
+    """Vetor 5D do recurso"""
+    return np.array([
+        recurso.facilidadeUso,
+        recurso.adaptabilidadePedagogica,
+        recurso.requisitosInfraestrutura,
+        recurso.engajamentoPotencial,
+        recurso.custoAcessibilidade
+    ])
+
+
+def distancias_detalhadas(vetor_prof, vetor_rec):
+    """Distâncias por dimensão entre o perfil do professor e um recurso"""
+    return {
+        'familiaridade_facilidade': float(abs(vetor_prof[0] - vetor_rec[0])),
+        'tempo_adaptabilidade': float(abs(vetor_prof[1] - vetor_rec[1])),
+        'infraestrutura': float(abs(vetor_prof[2] - vetor_rec[2])),
+        'engajamento': float(abs(vetor_prof[3] - vetor_rec[3])),
+        'desempenho_acessibilidade': float(abs(vetor_prof[4] - vetor_rec[4]))
+    }
+
+
+class AgrupadorCatalogo:
+    """K-Means sobre o catálogo completo com atribuição incremental de recursos"""
+
+    def __init__(self, n_clusters=None):
+        self.n_clusters = n_clusters or Config.NUM_CLUSTERS
+        self.media = None
+        self.desvio = None
+        self.centroides = None
+        self.tamanhos = None
+        self.atribuicoes = {}
+
+    def ajustar(self, ids, X):
+        """Treina o K-Means sobre a matriz de características do catálogo"""
+        self.atribuicoes = {}
+        if len(ids) == 0:
+            self.centroides = None
+            return
+
+        scaler = StandardScaler().fit(X)
+        self.media = scaler.mean_
+        self.desvio = scaler.scale_
+        X_scaled = scaler.transform(X)
+
+        modelo = KMeans(
+            n_clusters=min(self.n_clusters, len(ids)), init=Config.ML_KMEANS_INIT,
+            n_init=Config.ML_KMEANS_N_INIT, random_state=Config.ML_RANDOM_STATE
+        )
+        labels = modelo.fit_predict(X_scaled)
+        self.centroides = modelo.cluster_centers_.copy()
+        self.tamanhos = np.bincount(labels, minlength=len(self.centroides))
+        self.atribuicoes = dict(zip(ids, labels.tolist()))
+
+    def atribuir(self, recurso_id, vetor):
+        """Associa um recurso ao centróide mais próximo e ajusta a média do cluster"""
+        if self.centroides is None:
+            self.ajustar([recurso_id], np.array([vetor], dtype=float))
+            return self.atribuicoes[recurso_id]
+
+        x = (np.asarray(vetor, dtype=float) - self.media) / self.desvio
+        label = int(np.argmin(np.linalg.norm(self.centroides - x, axis=1)))
+        self.tamanhos[label] += 1
+        self.centroides[label] += (x - self.centroides[label]) / self.tamanhos[label]
+        self.atribuicoes[recurso_id] = label
+        return label
+
+    def remover(self, recurso_id, vetor):
+        """Retira um recurso do seu cluster, ajustando a média do centróide"""
+        label = self.atribuicoes.pop(recurso_id, None)
+        if label is None:
+            return
+        x = (np.asarray(vetor, dtype=float) - self.media) / self.desvio
+        n = self.tamanhos[label]
+        if n > 1:
+            self.centroides[label] = (self.centroides[label] * n - x) / (n - 1)
+        self.tamanhos[label] = n - 1
+
+    def exportar_estado(self):
+        """Escalonamento, centróides e atribuições (para o cache em disco)"""
+        if self.centroides is None:
+            return {'n_clusters': self.n_clusters, 'vazio': True}
+        return {
+            'n_clusters': self.n_clusters,
+            'vazio': False,
+            'media': self.media,
+            'desvio': self.desvio,
+            'centroides': self.centroides,
+            'tamanhos': self.tamanhos,
+            'ids': np.fromiter(self.atribuicoes.keys(), dtype=np.int64, count=len(self.atribuicoes)),
+            'labels': np.fromiter(self.atribuicoes.values(), dtype=np.int64, count=len(self.atribuicoes))
+        }
+
+    def restaurar_estado(self, estado):
+        """Recarrega o estado exportado sem rodar o K-Means"""
+        if estado['n_clusters'] != self.n_clusters:
+            raise ValueError("Estado de agrupamento com número de clusters diferente")
+        if estado['vazio']:
+            self.centroides = None
+            self.atribuicoes = {}
+            return
+        self.media = np.array(estado['media'], dtype=float)
+        self.desvio = np.array(estado['desvio'], dtype=float)
+        self.centroides = np.array(estado['centroides'], dtype=float)
+        self.tamanhos = np.array(estado['tamanhos'])
+        self.atribuicoes = dict(zip(estado['ids'].tolist(), estado['labels'].tolist()))
+
+    def obter_resumo(self):
+        """Retorna tamanho e nome de cada cluster do catálogo"""
+        if self.centroides is None:
+            return {'n_clusters': 0, 'clusters': {}}
         return {
-            'familiaridade_facilidade': float(abs(vetor_prof[0] - vetor_rec[0])),
-            'tempo_adaptabilidade': float(abs(vetor_prof[1] - vetor_rec[1])),
-            'infraestrutura': float(abs(vetor_prof[2] - vetor_rec[2])),
-            'engajamento': float(abs(vetor_prof[3] - vetor_rec[3])),
-            'desempenho_acessibilidade': float(abs(vetor_prof[4] - vetor_rec[4]))
+            'n_clusters': len(self.centroides),
+            'clusters': {
+                str(label): {
+                    'nome': Config.CLUSTER_NAMES.get(label, f"Cluster {label}"),
+                    'tamanho': int(tamanho)
+                }
+                for label, tamanho in enumerate(self.tamanhos)
+            }
         }
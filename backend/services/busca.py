@@ -0,0 +1,303 @@
+"""
+BUSCA TEXTUAL - Índice invertido com ranking BM25
+Indexa nome, descrição, categoria e tags dos recursos com tokenização em
+português (sem acentos, sem stopwords, plural e gênero reduzidos a um
+radical). Mantido incrementalmente pelo CatalogoRecursos a cada escrita.
+"""
+import re
+import sys
+import threading
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+
+from config import Config
+from models.recursos import CARACTERISTICAS
+
+STOPWORDS = frozenset(
+    'a ao aos as com como da das de do dos e em na nas no nos o os ou para '
+    'pela pelas pelo pelos por que se sem sua suas seu seus um uma umas uns'.split()
+)
+
+# Plurais do português (ordem importa: sufixos mais longos primeiro)
+SUFIXOS_PLURAL = (
+    ('coes', 'cao'), ('soes', 'sao'), ('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'),
+    ('eis', 'el'), ('ois', 'ol'), ('uis', 'ul'), ('res', 'r'), ('zes', 'z'),
+    ('ns', 'm'), ('s', '')
+)
+
+_PALAVRA = re.compile(r'[a-z0-9]+')
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos ("Simulação" -> "simulacao")"""
+    texto = str(texto).lower()
+    if texto.isascii():
+        return texto
+    # Só [a-z0-9] forma tokens, então descartar o que não é ASCII após a decomposição basta
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+
+
+@lru_cache(maxsize=65536)
+def radical(token):
+    """Reduz plural e gênero: "simulações" e "simulação" -> "simulaca" """
+    if len(token) > 3:
+        for sufixo, troca in SUFIXOS_PLURAL:
+            if token.endswith(sufixo):
+                token = token[:-len(sufixo)] + troca
+                break
+    if len(token) > 4 and token[-1] in 'aoe':
+        token = token[:-1]
+    return token
+
+
+def tokenizar(texto):
+    return [
+        radical(t) for t in _PALAVRA.findall(normalizar(texto))
+        if len(t) > 1 and t not in STOPWORDS
+    ]
+
+
+class IndiceBusca:
+    """
+    Índice invertido termo -> {documento: frequência ponderada pelo campo}.
+    Documentos são numerados densamente para que comprimentos e
+    características fiquem em arrays e o BM25 seja calculado com numpy.
+    Postings e arrays são alterados no lugar a cada escrita, então buscas e
+    escritas passam pelo mesmo lock (só a tokenização da consulta fica fora).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._zerar()
+
+    def _zerar(self):
+        self._postings = {}
+        # Cache termo -> (versão, documentos, contribuição BM25), recalculado após escritas
+        self._contribuicoes = {}
+        self._scores_finais = (None, None)
+        self._versao = 0
+        self._documentos = {}
+        self._termos_documento = {}
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._comprimentos = np.zeros(0)
+        self._features = np.zeros((0, len(CARACTERISTICAS)))
+        self._livres = []
+        self._soma_comprimentos = 0.0
+        self._n = 0
+
+    def construir(self, recursos):
+        with self._lock:
+            self._zerar()
+            for recurso in recursos:
+                self.adicionar(recurso)
+
+    def exportar_estado(self):
+        """Postings em formato CSR e arrays por documento (para o cache em disco)"""
+        with self._lock:
+            alocados = self._n + len(self._livres)
+            termos = list(self._postings)
+            tamanhos = [len(self._postings[t]) for t in termos]
+            total = sum(tamanhos)
+            return {
+                'termos': termos,
+                'limites': np.cumsum([0] + tamanhos, dtype=np.int64),
+                'documentos': np.fromiter(
+                    (d for t in termos for d in self._postings[t]), dtype=np.int64, count=total
+                ),
+                'frequencias': np.fromiter(
+                    (f for t in termos for f in self._postings[t].values()), dtype=float, count=total
+                ),
+                'ids': self._ids[:alocados].copy(),
+                'comprimentos': self._comprimentos[:alocados].copy(),
+                'features': self._features[:alocados].copy(),
+                'livres': list(self._livres),
+                'soma_comprimentos': float(self._soma_comprimentos),
+                'n': self._n
+            }
+
+    def restaurar_estado(self, estado):
+        """
+        Recarrega o índice exportado sem tokenizar os recursos. A numeração
+        dos documentos e a ordem dos postings são as mesmas, então as buscas
+        dão o mesmo resultado do índice original
+        """
+        termos, limites = estado['termos'], estado['limites'].tolist()
+        documentos, frequencias = estado['documentos'].tolist(), estado['frequencias'].tolist()
+        ids = estado['ids']
+        livres = set(estado['livres'])
+        if len(limites) != len(termos) + 1 or limites[-1] != len(documentos):
+            raise ValueError("Estado do índice de busca inconsistente")
+        if len(ids) - len(livres) != estado['n']:
+            raise ValueError("Estado do índice de busca com número de documentos divergente")
+
+        with self._lock:
+            self._zerar()
+            termos_documento = {}
+            for termo, inicio, fim in zip(termos, limites, limites[1:]):
+                self._postings[termo] = dict(zip(documentos[inicio:fim], frequencias[inicio:fim]))
+                for documento in documentos[inicio:fim]:
+                    termos_documento.setdefault(documento, []).append(termo)
+            ativos = [d for d in range(len(ids)) if d not in livres]
+            self._documentos = dict(zip(ids[ativos].tolist(), ativos))
+            self._termos_documento = {d: tuple(termos_documento.get(d, ())) for d in ativos}
+            # Cópias graváveis: os arrays do cache vêm em memory-map somente leitura
+            self._ids = np.array(ids, dtype=np.int64)
+            self._comprimentos = np.array(estado['comprimentos'], dtype=float)
+            self._features = np.array(estado['features'], dtype=float).reshape(-1, len(CARACTERISTICAS))
+            self._livres = list(estado['livres'])
+            self._soma_comprimentos = estado['soma_comprimentos']
+            self._n = estado['n']
+
+    def _termos(self, recurso):
+        """Frequência de cada termo no recurso, ponderada pelo peso do campo"""
+        frequencias = {}
+        for campo, peso in Config.BUSCA_PESOS_CAMPOS.items():
+            valor = getattr(recurso, campo, None)
+            if isinstance(valor, (list, tuple)):
+                valor = ' '.join(map(str, valor))
+            for termo in tokenizar(valor or ''):
+                frequencias[termo] = frequencias.get(termo, 0.0) + peso
+        return frequencias
+
+    def _novo_documento(self):
+        if self._livres:
+            return self._livres.pop()
+        documento = self._n
+        if documento == len(self._ids):
+            capacidade = max(16, 2 * len(self._ids))
+            self._ids = np.resize(self._ids, capacidade)
+            self._comprimentos = np.resize(self._comprimentos, capacidade)
+            features = np.zeros((capacidade, len(CARACTERISTICAS)))
+            features[:len(self._features)] = self._features
+            self._features = features
+        return documento
+
+    def adicionar(self, recurso):
+        with self._lock:
+            frequencias = self._termos(recurso)
+            documento = self._novo_documento()
+            self._documentos[recurso.id] = documento
+            self._termos_documento[documento] = tuple(frequencias)
+            self._ids[documento] = recurso.id
+            self._comprimentos[documento] = sum(frequencias.values())
+            self._features[documento] = recurso.vetor_caracteristicas()
+            self._soma_comprimentos += self._comprimentos[documento]
+            self._n += 1
+            for termo, frequencia in frequencias.items():
+                self._postings.setdefault(termo, {})[documento] = frequencia
+            self._versao += 1
+
+    def remover(self, recurso_id):
+        with self._lock:
+            documento = self._documentos.pop(recurso_id, None)
+            if documento is None:
+                return
+            for termo in self._termos_documento.pop(documento):
+                postings = self._postings[termo]
+                del postings[documento]
+                if not postings:
+                    del self._postings[termo]
+                    self._contribuicoes.pop(termo, None)
+            self._soma_comprimentos -= self._comprimentos[documento]
+            self._comprimentos[documento] = 0.0
+            self._n -= 1
+            self._livres.append(documento)
+            self._versao += 1
+
+    def atualizar(self, recurso):
+        with self._lock:
+            self.remover(recurso.id)
+            self.adicionar(recurso)
+
+    def _contribuicao(self, termo):
+        """Documentos do termo e sua parcela do BM25 (idf·tf saturado)"""
+        cache = self._contribuicoes.get(termo)
+        if cache is not None and cache[0] == self._versao:
+            return cache[1], cache[2]
+        k1, b = Config.BUSCA_BM25_K1, Config.BUSCA_BM25_B
+        postings = self._postings[termo]
+        documentos = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+        frequencias = np.fromiter(postings.values(), dtype=float, count=len(postings))
+        idf = np.log(1 + (self._n - len(documentos) + 0.5) / (len(documentos) + 0.5))
+        media_comprimento = self._soma_comprimentos / self._n
+        normalizacao = k1 * (1 - b + b * self._comprimentos[documentos] / media_comprimento)
+        contribuicao = idf * frequencias * (k1 + 1) / (frequencias + normalizacao)
+        self._contribuicoes[termo] = (self._versao, documentos, contribuicao)
+        return documentos, contribuicao
+
+    def _obter_scores_finais(self, pesos):
+        """scoreFinal de todos os documentos para os pesos da regressão (em cache)"""
+        chave = (self._versao, tuple(pesos[c] for c in CARACTERISTICAS))
+        if self._scores_finais[0] != chave:
+            X = self._features
+            # Mesma ordem de operações do score das recomendações
+            scores = X[:, 0] * pesos[CARACTERISTICAS[0]]
+            for j in range(1, len(CARACTERISTICAS)):
+                scores = scores + X[:, j] * pesos[CARACTERISTICAS[j]]
+            self._scores_finais = (chave, scores)
+        return self._scores_finais[1]
+
+    def buscar(self, consulta, limite=20, pesos=None, peso_score=0.0):
+        """
+        Retorna (total de documentos encontrados, [(id, relevancia, scoreFinal, score)])
+        ordenados por score. relevancia é o BM25 normalizado pelo maior valor
+        da consulta; score = (1 - peso_score)·relevancia + peso_score·scoreFinal
+        """
+        termos = set(tokenizar(consulta))
+        with self._lock:
+            termos = [t for t in termos if t in self._postings]
+            if not termos or not self._n:
+                return 0, []
+            if len(termos) == 1:
+                encontrados, bm25 = self._contribuicao(termos[0])
+            else:
+                acumulado = np.zeros(len(self._ids))
+                for termo in termos:
+                    documentos, contribuicao = self._contribuicao(termo)
+                    acumulado[documentos] += contribuicao
+                encontrados = np.flatnonzero(acumulado)
+                bm25 = acumulado[encontrados]
+
+            relevancia = bm25 / bm25.max()
+            scores_finais = self._obter_scores_finais(pesos) if pesos is not None else None
+            if peso_score and scores_finais is not None:
+                combinado = (1 - peso_score) * relevancia + peso_score * scores_finais[encontrados]
+            else:
+                combinado = relevancia
+
+            if limite < len(encontrados):
+                topo = np.argpartition(-combinado, limite - 1)[:limite]
+            else:
+                topo = np.arange(len(encontrados))
+            # Empates pelo id para uma ordem estável
+            ids = self._ids[encontrados[topo]]
+            ordem = np.lexsort((ids, -combinado[topo]))
+            topo, ids = topo[ordem], ids[ordem]
+            score_final = (scores_finais[encontrados[topo]] if scores_finais is not None
+                           else np.zeros(len(topo)))
+
+        return len(encontrados), [
+            (int(i), round(float(r), 4), round(float(s), 4), round(float(c), 4))
+            for i, r, s, c in zip(ids, relevancia[topo], score_final, combinado[topo])
+        ]
+
+    def memoria_bytes(self):
+        """Estimativa em bytes de postings, arrays e caches do índice"""
+        with self._lock:
+            postings = sys.getsizeof(self._postings) + sum(
+                sys.getsizeof(termo) + sys.getsizeof(documentos)
+                for termo, documentos in self._postings.items()
+            )
+            arrays = self._ids.nbytes + self._comprimentos.nbytes + self._features.nbytes
+            caches = sum(d.nbytes + c.nbytes for _, d, c in self._contribuicoes.values())
+            return int(postings + arrays + caches + sys.getsizeof(self._documentos))
+
+    def obter_estatisticas(self):
+        with self._lock:
+            return {
+                'documentos': self._n,
+                'termos': len(self._postings),
+                'comprimento_medio': round(self._soma_comprimentos / self._n, 3) if self._n else 0.0
+            }
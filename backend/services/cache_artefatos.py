@@ -0,0 +1,129 @@
+"""
+CACHE DE ARTEFATOS - Persistência em disco do que é derivado do catálogo
+Regressão, centróides do catálogo, índice de busca e visões materializadas
+são gravados em um diretório por chave (hash da assinatura do repositório,
+dos parâmetros que influenciam o treino e das versões das bibliotecas). Na
+inicialização, se a chave coincide, os artefatos são carregados com
+memory-map em vez de recalculados.
+"""
+import hashlib
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import tempfile
+
+import numpy as np
+import sklearn
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Incrementar ao mudar o formato dos arquivos gravados
+VERSAO_FORMATO = 2
+
+# Parâmetros de configuração que alteram os artefatos
+PARAMETROS_CHAVE = (
+    'NUM_CLUSTERS', 'PESOS_REGRESSAO_PADRAO', 'MIN_FACILIDADE',
+    'LIMIAR_CONECTIVIDADE_BAIXA', 'LIMIAR_FAMILIARIDADE_BAIXA',
+    'ML_RANDOM_STATE', 'ML_KMEANS_INIT', 'ML_KMEANS_N_INIT',
+    'REGRESSAO_TIPO', 'REGRESSAO_TARGET', 'REGRESSAO_ALPHA', 'REGRESSAO_ALPHA_LASSO',
+    'BUSCA_PESOS_CAMPOS'
+)
+
+MANIFESTO = 'manifesto.json'
+_CHAVE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class CacheArtefatos:
+    """Seções de artefatos (regressao, agrupamento, busca, visoes) gravadas por chave"""
+
+    def __init__(self, diretorio=None, manter=None):
+        self.diretorio = diretorio or Config.CACHE_ARTEFATOS_DIR
+        self.manter = manter or Config.CACHE_ARTEFATOS_MANTER
+
+    @staticmethod
+    def chave(repositorio):
+        """
+        Hash da assinatura do repositório (versão ou hash dos arquivos, sem
+        carregar os recursos) e do ambiente
+        """
+        h = hashlib.sha256()
+        ambiente = {
+            'formato': VERSAO_FORMATO,
+            'repositorio': type(repositorio).__name__,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'parametros': {nome: getattr(Config, nome) for nome in PARAMETROS_CHAVE}
+        }
+        h.update(json.dumps(ambiente, sort_keys=True).encode('utf-8'))
+        h.update(b'\n')
+        h.update(repositorio.assinatura().encode('utf-8'))
+        return h.hexdigest()
+
+    def _caminho(self, chave, secao):
+        return os.path.join(self.diretorio, chave, secao)
+
+    def existe(self, chave, secao):
+        return os.path.isfile(os.path.join(self._caminho(chave, secao), MANIFESTO))
+
+    def carregar(self, chave, secao):
+        """
+        Retorna o estado gravado de uma seção (arrays em memory-map somente
+        leitura) ou None se a chave não estiver no cache
+        """
+        caminho = self._caminho(chave, secao)
+        if not self.existe(chave, secao):
+            return None
+        try:
+            with open(os.path.join(caminho, MANIFESTO), 'r', encoding='utf-8') as f:
+                manifesto = json.load(f)
+            estado = manifesto['valores']
+            for nome in manifesto['arrays']:
+                estado[nome] = np.load(os.path.join(caminho, f'{nome}.npy'), mmap_mode='r')
+            return estado
+        except Exception as e:
+            logger.warning(f"Cache de artefatos ignorado ({secao}): {str(e)}")
+            # Seção corrompida: remove para que seja gravada de novo
+            shutil.rmtree(caminho, ignore_errors=True)
+            return None
+
+    def salvar(self, chave, secao, estado):
+        """Grava uma seção: arrays em .npy e o restante no manifesto"""
+        destino = self._caminho(chave, secao)
+        try:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            temporario = tempfile.mkdtemp(prefix=f'.{secao}-', dir=os.path.dirname(destino))
+            arrays = [nome for nome, valor in estado.items() if isinstance(valor, np.ndarray)]
+            for nome in arrays:
+                np.save(os.path.join(temporario, f'{nome}.npy'), np.ascontiguousarray(estado[nome]))
+            manifesto = {
+                'arrays': arrays,
+                'valores': {nome: valor for nome, valor in estado.items() if nome not in arrays}
+            }
+            with open(os.path.join(temporario, MANIFESTO), 'w', encoding='utf-8') as f:
+                json.dump(manifesto, f, ensure_ascii=False)
+            try:
+                # Renomear o diretório publica a seção inteira de uma vez
+                os.rename(temporario, destino)
+            except OSError:
+                # Outro processo gravou a mesma chave primeiro
+                shutil.rmtree(temporario, ignore_errors=True)
+            self._limpar(chave)
+        except Exception as e:
+            logger.warning(f"Não foi possível gravar o cache de artefatos ({secao}): {str(e)}")
+
+    def _limpar(self, chave_atual):
+        """Mantém apenas as chaves mais recentes"""
+        # Só chaves (hash sha256): subdiretórios de outros catálogos ficam intactos
+        entradas = [
+            os.path.join(self.diretorio, nome) for nome in os.listdir(self.diretorio)
+            if nome != chave_atual and _CHAVE.match(nome) and os.path.isdir(os.path.join(self.diretorio, nome))
+        ]
+        entradas.sort(key=os.path.getmtime, reverse=True)
+        for caminho in entradas[max(self.manter - 1, 0):]:
+            shutil.rmtree(caminho, ignore_errors=True)
@@ -0,0 +1,192 @@
+"""
+CATÁLOGO - Artefatos derivados do repositório de recursos
+Mantém regressão e agrupamento do catálogo atualizados a cada escrita
+"""
+import logging
+import threading
+from config import Config
+from services.agrupamento import AgrupadorCatalogo
+from services.busca import IndiceBusca
+from services.cache_artefatos import CacheArtefatos
+from services.motor import MotorRecomendacao, SnapshotDesatualizado
+from services.regressao import RegressorPesos
+from services.visoes import VisoesElegibilidade
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogoRecursos:
+    """
+    Repositório de recursos com regressão e centróides mantidos
+    incrementalmente. Após cada escrita publica um novo MotorRecomendacao
+    (snapshot imutável) em `motor`; quem o lê não precisa de lock. O índice
+    de busca é alterado no lugar e serializa buscas e escritas no próprio lock.
+    """
+
+    def __init__(self, repositorio, iniciar_visoes=None, cache=None):
+        self.repositorio = repositorio
+        self.regressor = RegressorPesos()
+        self.agrupador = AgrupadorCatalogo()
+        self.busca = IndiceBusca()
+        self.visoes = VisoesElegibilidade(self)
+        if cache is None and Config.CACHE_ARTEFATOS_ATIVO:
+            cache = CacheArtefatos()
+        self.cache = cache
+        self.chave_cache = None
+        self._versao_chave = None
+        self._lock = threading.Lock()
+        self.motor = None
+
+        self.reconstruir()
+        repositorio.registrar_observador(self._ao_alterar)
+        if iniciar_visoes is None:
+            # Só o modo 'regras' serve recomendações pelas visões
+            iniciar_visoes = Config.CLASSIFICACAO_MODO == 'regras'
+        if iniciar_visoes:
+            self.visoes.iniciar()
+
+    @property
+    def versao(self):
+        return self.motor.versao
+
+    def reconstruir(self):
+        """
+        Recalcula todos os artefatos a partir do estado atual do repositório,
+        ou os carrega do cache em disco quando o conteúdo não mudou
+        """
+        with self._lock:
+            self._reconstruir()
+
+    def _reconstruir(self):
+        # Todas as leituras na mesma versão: o motor publicado corresponde
+        # exatamente ao estado do repositório em `versao`
+        with self.repositorio.leitura_consistente() as versao:
+            if self.cache is not None:
+                self.chave_cache = self.cache.chave(self.repositorio)
+            if not self._restaurar_do_cache():
+                ids, X = self.repositorio.obter_features()
+                self.regressor.treinar_features(X)
+                self.agrupador.ajustar(ids, X)
+                if self.cache is not None:
+                    self.cache.salvar(self.chave_cache, 'regressao', self.regressor.exportar_estado())
+                    self.cache.salvar(self.chave_cache, 'agrupamento', self.agrupador.exportar_estado())
+            if not self._restaurar_busca():
+                self.busca.construir(self.repositorio.obter_todos())
+                if self.cache is not None:
+                    self.cache.salvar(self.chave_cache, 'busca', self.busca.exportar_estado())
+            self._publicar(versao)
+
+        # Visões em cache só valem enquanto o catálogo não receber escritas
+        self._versao_chave = versao
+        if self.cache is not None:
+            estado = self.cache.carregar(self.chave_cache, 'visoes')
+            if estado is not None:
+                self.visoes.restaurar(estado, self.motor)
+
+    def sincronizar(self):
+        """
+        Reconstrói os artefatos se outro processo alterou o repositório
+        compartilhado (versão do repositório diferente da do motor publicado).
+        Chamado antes de atender cada requisição; retorna True se reconstruiu
+        """
+        if not self.repositorio.compartilhado or self.repositorio.versao == self.motor.versao:
+            return False
+        with self._lock:
+            if self.repositorio.versao == self.motor.versao:
+                return False
+            logger.info(
+                f"Catálogo alterado por outro processo (versão {self.motor.versao} -> "
+                f"{self.repositorio.versao}), reconstruindo artefatos"
+            )
+            self._reconstruir()
+        return True
+
+    def consultar(self, funcao):
+        """
+        Executa funcao(motor) no motor publicado. Se o repositório avançar
+        durante a leitura (SnapshotDesatualizado), sincroniza e repete com o
+        motor seguinte, até Config.SNAPSHOT_TENTATIVAS vezes
+        """
+        for tentativa in range(Config.SNAPSHOT_TENTATIVAS):
+            try:
+                return funcao(self.motor)
+            except SnapshotDesatualizado as e:
+                if tentativa == Config.SNAPSHOT_TENTATIVAS - 1:
+                    raise
+                logger.debug(f"Snapshot desatualizado, repetindo: {str(e)}")
+                self.sincronizar()
+
+    def _restaurar_do_cache(self):
+        """Carrega regressão e agrupamento gravados para a chave atual"""
+        if self.cache is None:
+            return False
+        regressao = self.cache.carregar(self.chave_cache, 'regressao')
+        agrupamento = self.cache.carregar(self.chave_cache, 'agrupamento')
+        if regressao is None or agrupamento is None:
+            return False
+        try:
+            self.regressor.restaurar_estado(regressao)
+            self.agrupador.restaurar_estado(agrupamento)
+        except (KeyError, ValueError) as e:
+            logger.warning(f"Cache de artefatos inválido, recalculando: {str(e)}")
+            return False
+        logger.info(f"Artefatos do catálogo carregados do cache ({self.chave_cache[:12]})")
+        return True
+
+    def _restaurar_busca(self):
+        """Carrega o índice de busca gravado para a chave atual"""
+        if self.cache is None:
+            return False
+        estado = self.cache.carregar(self.chave_cache, 'busca')
+        if estado is None:
+            return False
+        try:
+            self.busca.restaurar_estado(estado)
+        except (KeyError, ValueError) as e:
+            logger.warning(f"Índice de busca em cache inválido, reconstruindo: {str(e)}")
+            return False
+        return True
+
+    def visoes_construidas(self, motor):
+        """Chamado pelas visões ao terminar de materializar todas as chaves de uma versão"""
+        if self.cache is None or motor.versao != self._versao_chave:
+            return
+        if not self.cache.existe(self.chave_cache, 'visoes'):
+            self.cache.salvar(self.chave_cache, 'visoes', self.visoes.exportar(motor.versao))
+
+    def _ao_alterar(self, evento, anterior, novo, versao):
+        """Aplica uma escrita do repositório aos artefatos em O(d²)"""
+        with self._lock:
+            if versao <= self.motor.versao:
+                # Já incorporada por uma reconstrução (sincronizar)
+                return
+            if versao != self.motor.versao + 1:
+                # Escritas de outros processos antes desta: o incremental não basta
+                self._reconstruir()
+                return
+            if evento == 'inserido':
+                self.regressor.adicionar_recurso(novo)
+                self.agrupador.atribuir(novo.id, novo.vetor_caracteristicas())
+                self.busca.adicionar(novo)
+            elif evento == 'atualizado':
+                self.regressor.atualizar_recurso(anterior, novo)
+                self.agrupador.remover(anterior.id, anterior.vetor_caracteristicas())
+                self.agrupador.atribuir(novo.id, novo.vetor_caracteristicas())
+                self.busca.atualizar(novo)
+            elif evento == 'removido':
+                self.regressor.remover_recurso(anterior)
+                self.agrupador.remover(anterior.id, anterior.vetor_caracteristicas())
+                self.busca.remover(anterior.id)
+            self._publicar(versao)
+
+    def _publicar(self, versao):
+        """Troca o motor compartilhado por um snapshot da versão `versao` do repositório"""
+        self.motor = MotorRecomendacao(
+            self.repositorio, self.visoes,
+            versao=versao,
+            total_recursos=self.repositorio.contar(),
+            pesos=self.regressor.obter_pesos(),
+            metricas_regressao=self.regressor.obter_metricas(),
+            resumo_agrupamento=self.agrupador.obter_resumo()
+        )
+        self.visoes.invalidar()
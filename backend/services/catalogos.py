@@ -0,0 +1,246 @@
+"""
+CATÁLOGOS - Vários catálogos de recursos no mesmo processo
+Cada rede de ensino tem seu catálogo em CATALOGOS_DIR (<nome>.json ou
+<nome>.sqlite3). Repositório, índices e artefatos treinados de um catálogo
+são carregados na primeira requisição que o usa e mantidos em um LRU
+limitado por quantidade e por memória estimada.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+from models.recursos import RecursosRepository
+from models.recursos_sqlite import RecursosRepositorySQLite
+from services.cache_artefatos import CacheArtefatos
+from services.catalogo import CatalogoRecursos
+
+logger = logging.getLogger(__name__)
+
+_NOME_VALIDO = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class CatalogoNaoEncontrado(KeyError):
+    """Nome de catálogo inválido ou sem arquivo correspondente"""
+
+    def __str__(self):
+        return f"Catálogo não encontrado: {self.args[0]}"
+
+
+class CatalogoIndisponivel(RuntimeError):
+    """O catálogo existe mas não pôde ser carregado ou sincronizado"""
+
+    def __init__(self, nome, causa):
+        super().__init__(f"Catálogo '{nome}' indisponível: {causa}")
+        self.nome = nome
+
+
+class PacoteCatalogo:
+    """Repositório e artefatos derivados (regressão, visões, busca) de um catálogo"""
+
+    def __init__(self, nome, repositorio, catalogo, tempo_carga):
+        self.nome = nome
+        self.repositorio = repositorio
+        self.catalogo = catalogo
+        self.tempo_carga = tempo_carga
+        self.carregado_em = time.time()
+        self.ultimo_acesso = self.carregado_em
+        self.acessos = 0
+        self._memoria_base = repositorio.memoria_estimada() + catalogo.busca.memoria_bytes()
+
+    def memoria_bytes(self):
+        """Estimativa: repositório e busca (medidos na carga) mais as visões atuais"""
+        return self._memoria_base + self.catalogo.visoes.obter_estatisticas()['memoria_bytes']
+
+    def descartar(self):
+        """
+        Libera recursos de fundo e fecha o repositório: escritas em andamento
+        e a compactação terminam, novas escritas são recusadas. Requisições
+        em andamento mantêm a referência e terminam as leituras normalmente;
+        o restante é coletado pelo GC.
+        """
+        self.catalogo.visoes.parar()
+        if hasattr(self.repositorio, 'fechar'):
+            self.repositorio.fechar()
+
+    def obter_resumo(self):
+        return {
+            'nome': self.nome,
+            'total_recursos': self.repositorio.contar(),
+            'memoria_bytes': self.memoria_bytes(),
+            'tempo_carga_s': round(self.tempo_carga, 3),
+            'acessos': self.acessos,
+            'carregado_em': self.carregado_em,
+            'ultimo_acesso': self.ultimo_acesso
+        }
+
+
+class _Carregamento:
+    """Carga em andamento; requisições simultâneas do mesmo catálogo esperam por ela"""
+
+    def __init__(self):
+        self.concluido = threading.Event()
+        self.pacote = None
+        self.erro = None
+
+
+class GerenciadorCatalogos:
+    """LRU de PacoteCatalogo com carga sob demanda, despejo e métricas"""
+
+    def __init__(self, backend=None, diretorio=None, max_catalogos=None, memoria_max=None):
+        self.backend = backend or Config.REPOSITORIO_BACKEND
+        self.diretorio = diretorio or Config.CATALOGOS_DIR
+        self.max_catalogos = max_catalogos or Config.CATALOGOS_MAX
+        self.memoria_max = memoria_max or Config.CATALOGOS_MEMORIA_MAX_BYTES
+        self._pacotes = OrderedDict()
+        self._carregando = {}
+        # Pacotes despejados ainda fechando: a recarga do mesmo nome espera
+        self._fechando = {}
+        self._lock = threading.Lock()
+        self._metricas = {
+            'acertos': 0,
+            'faltas': 0,
+            'carregamentos': 0,
+            'falhas_carregamento': 0,
+            'despejos': 0,
+            'tempo_total_carga_s': 0.0
+        }
+
+    def _caminhos(self, nome):
+        """(arquivo JSON, arquivo SQLite) do catálogo"""
+        if nome == Config.CATALOGO_PADRAO:
+            return Config.RECURSOS_JSON, Config.RECURSOS_SQLITE
+        return (os.path.join(self.diretorio, f'{nome}.json'),
+                os.path.join(self.diretorio, f'{nome}.sqlite3'))
+
+    def existe(self, nome):
+        if not nome or not _NOME_VALIDO.match(nome):
+            return False
+        caminho_json, caminho_sqlite = self._caminhos(nome)
+        if self.backend == 'sqlite' and os.path.exists(caminho_sqlite):
+            return True
+        return os.path.exists(caminho_json)
+
+    def listar_disponiveis(self):
+        nomes = {Config.CATALOGO_PADRAO}
+        if os.path.isdir(self.diretorio):
+            for arquivo in os.listdir(self.diretorio):
+                nome, extensao = os.path.splitext(arquivo)
+                if extensao in ('.json', '.sqlite3') and _NOME_VALIDO.match(nome):
+                    nomes.add(nome)
+        return sorted(n for n in nomes if self.existe(n))
+
+    def obter(self, nome=None):
+        """Retorna o pacote do catálogo, carregando-o se necessário"""
+        nome = nome or Config.CATALOGO_PADRAO
+        with self._lock:
+            pacote = self._pacotes.get(nome)
+            if pacote is not None:
+                self._pacotes.move_to_end(nome)
+                self._metricas['acertos'] += 1
+                pacote.acessos += 1
+                pacote.ultimo_acesso = time.time()
+                return pacote
+            carregamento = self._carregando.get(nome)
+            responsavel = carregamento is None
+            if responsavel:
+                if not self.existe(nome):
+                    raise CatalogoNaoEncontrado(nome)
+                carregamento = self._carregando[nome] = _Carregamento()
+                fechando = self._fechando.get(nome)
+                self._metricas['faltas'] += 1
+
+        if not responsavel:
+            carregamento.concluido.wait()
+            if carregamento.erro is not None:
+                raise carregamento.erro
+            return carregamento.pacote
+
+        try:
+            if fechando is not None:
+                fechando.wait()
+            pacote = self._carregar(nome)
+        except Exception as e:
+            logger.error(f"Falha ao carregar o catálogo '{nome}': {str(e)}", exc_info=True)
+            with self._lock:
+                self._metricas['falhas_carregamento'] += 1
+                del self._carregando[nome]
+            carregamento.erro = CatalogoIndisponivel(nome, e)
+            carregamento.concluido.set()
+            raise carregamento.erro from e
+
+        with self._lock:
+            self._pacotes[nome] = pacote
+            del self._carregando[nome]
+            self._metricas['carregamentos'] += 1
+            self._metricas['tempo_total_carga_s'] += pacote.tempo_carga
+            pacote.acessos += 1
+            despejados = self._despejar()
+        carregamento.pacote = pacote
+        carregamento.concluido.set()
+        for despejado in despejados:
+            self._fechar(despejado)
+        return pacote
+
+    def _fechar(self, pacote):
+        """Descarta um pacote despejado e libera a recarga do seu nome"""
+        try:
+            pacote.descartar()
+        except Exception as e:
+            logger.error(f"Erro ao descartar o catálogo '{pacote.nome}': {str(e)}", exc_info=True)
+        finally:
+            with self._lock:
+                fechado = self._fechando.pop(pacote.nome)
+            fechado.set()
+
+    def _carregar(self, nome):
+        inicio = time.perf_counter()
+        caminho_json, caminho_sqlite = self._caminhos(nome)
+        if self.backend == 'sqlite':
+            repositorio = RecursosRepositorySQLite(caminho_sqlite, caminho_json)
+        else:
+            repositorio = RecursosRepository(caminho_json)
+        cache = None
+        if Config.CACHE_ARTEFATOS_ATIVO:
+            # Um subdiretório por catálogo: a limpeza de chaves antigas não cruza catálogos
+            cache = CacheArtefatos(os.path.join(Config.CACHE_ARTEFATOS_DIR, nome))
+        catalogo = CatalogoRecursos(repositorio, cache=cache)
+        pacote = PacoteCatalogo(nome, repositorio, catalogo, time.perf_counter() - inicio)
+        logger.info(
+            f"Catálogo '{nome}' carregado: {repositorio.contar()} recursos em "
+            f"{pacote.tempo_carga:.2f}s (~{pacote.memoria_bytes() / 2**20:.1f} MB)"
+        )
+        return pacote
+
+    def _despejar(self):
+        """Remove os menos usados até respeitar os limites (o mais recente sempre fica)"""
+        despejados = []
+        while len(self._pacotes) > 1 and (
+            len(self._pacotes) > self.max_catalogos
+            or sum(p.memoria_bytes() for p in self._pacotes.values()) > self.memoria_max
+        ):
+            nome, pacote = self._pacotes.popitem(last=False)
+            self._fechando[nome] = threading.Event()
+            self._metricas['despejos'] += 1
+            despejados.append(pacote)
+            logger.info(f"Catálogo '{nome}' descarregado (LRU)")
+        return despejados
+
+    def obter_estatisticas(self):
+        with self._lock:
+            pacotes = list(self._pacotes.values())
+            metricas = dict(self._metricas)
+        carregados = [p.obter_resumo() for p in pacotes]
+        consultas = metricas['acertos'] + metricas['faltas']
+        return {
+            'carregados': carregados,
+            'memoria_bytes': sum(p['memoria_bytes'] for p in carregados),
+            'memoria_max_bytes': self.memoria_max,
+            'max_catalogos': self.max_catalogos,
+            'taxa_acerto': round(metricas['acertos'] / consultas, 4) if consultas else None,
+            **metricas,
+            'tempo_total_carga_s': round(metricas['tempo_total_carga_s'], 3)
+        }
@@ -0,0 +1,98 @@
+"""
+MOTOR DE RECOMENDAÇÃO - Snapshot imutável do catálogo
+Um único motor é compartilhado por todas as threads; cada requisição cria
+apenas um ContextoRecomendacao com as respostas do questionário. Serve só o
+modo 'regras': no modo 'arvore' (padrão) cada requisição ainda treina a
+árvore de decisão e o K-Means (SistemaRecomendacao), usando do motor apenas
+os pesos e as métricas da regressão.
+"""
+from types import MappingProxyType
+
+from services.agrupamento import vetor_professor, vetor_recurso, distancias_detalhadas
+from services.recomendacao import formatar_resultado, gerar_analises, resultado_vazio
+
+
+def _congelar(dados):
+    """Cópia somente leitura de um dicionário de pesos ou métricas"""
+    return MappingProxyType({
+        chave: tuple(valor) if isinstance(valor, list) else valor
+        for chave, valor in (dados or {}).items()
+    })
+
+
+class SnapshotDesatualizado(RuntimeError):
+    """O repositório avançou além da versão do motor durante a leitura"""
+
+    def __init__(self, versao_motor, versao_repositorio):
+        super().__init__(
+            f"Motor na versão {versao_motor}, repositório na versão {versao_repositorio}"
+        )
+        self.versao_motor = versao_motor
+        self.versao_repositorio = versao_repositorio
+
+
+class ContextoRecomendacao:
+    """Estado de uma requisição: as respostas e o vetor do professor"""
+
+    __slots__ = ('respostas', 'vetor_professor')
+
+    def __init__(self, respostas):
+        self.respostas = respostas
+        self.vetor_professor = vetor_professor(respostas)
+
+    def distancias(self, recurso):
+        return distancias_detalhadas(self.vetor_professor, vetor_recurso(recurso))
+
+
+class MotorRecomendacao:
+    """
+    Pesos, métricas e resumo do catálogo em uma versão. Não é alterado depois
+    de criado: o CatalogoRecursos publica um novo motor a cada escrita e as
+    requisições em andamento terminam com o snapshot que já tinham.
+    """
+
+    __slots__ = ('repositorio', 'visoes', 'versao', 'total_recursos', 'pesos',
+                 'metricas_regressao', 'resumo_agrupamento')
+
+    def __init__(self, repositorio, visoes, versao, total_recursos, pesos,
+                 metricas_regressao, resumo_agrupamento):
+        definir = object.__setattr__
+        definir(self, 'repositorio', repositorio)
+        definir(self, 'visoes', visoes)
+        definir(self, 'versao', versao)
+        definir(self, 'total_recursos', total_recursos)
+        definir(self, 'pesos', _congelar(pesos))
+        definir(self, 'metricas_regressao', _congelar(metricas_regressao))
+        definir(self, 'resumo_agrupamento', MappingProxyType(dict(resumo_agrupamento)))
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError('MotorRecomendacao é imutável')
+
+    def recomendar(self, respostas):
+        """
+        Ranking das respostas a partir da visão materializada da sua chave.
+        Visão e recursos são lidos na versão deste motor: se o repositório já
+        avançou, levanta SnapshotDesatualizado (ver CatalogoRecursos.consultar)
+        """
+        contexto = ContextoRecomendacao(respostas)
+        visao, recursos = self.visoes.obter_recursos(respostas, self)
+        pesos = dict(visao.pesos)
+        metricas_regressao = dict(visao.metricas_regressao)
+
+        recursos_com_score = [
+            {
+                'recurso': recurso,
+                'scoreFinal': float(score),
+                'cluster_id': int(cluster_id),
+                'distancias': contexto.distancias(recurso)
+            }
+            for recurso, score, cluster_id in zip(recursos, visao.scores, visao.clusters)
+        ]
+
+        if not recursos_com_score:
+            return resultado_vazio(self.total_recursos, pesos, metricas_regressao)
+
+        return {
+            'ranking': [formatar_resultado(r) for r in recursos_com_score],
+            'analises': gerar_analises(recursos_com_score, self.total_recursos, pesos, metricas_regressao)
+        }
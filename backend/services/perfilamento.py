@@ -0,0 +1,151 @@
+"""
+PERFILAMENTO SOB DEMANDA - cProfile e tracemalloc por requisição
+Ativado por um cabeçalho de administrador ou por amostragem (1 a cada N
+requisições). Cada perfil é gravado com o hash do questionário: estatísticas
+do cProfile (.prof), relatório em texto (.txt) e metadados (.json).
+"""
+import cProfile
+import hashlib
+import hmac
+import io
+import itertools
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def hash_questionario(dados):
+    """Identifica o formato do questionário independentemente da ordem das chaves"""
+    conteudo = json.dumps(dados, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:16]
+
+
+class PerfiladorRequisicoes:
+    """Decide quais requisições perfilar e grava os relatórios em disco"""
+
+    def __init__(self, diretorio=None, token=None, amostragem=None):
+        self.diretorio = diretorio or Config.PERFIL_DIR
+        self.token = token if token is not None else Config.PERFIL_TOKEN
+        self.amostragem = amostragem if amostragem is not None else Config.PERFIL_AMOSTRAGEM
+        # Desativado, o custo por requisição é a leitura deste atributo
+        self.ativo = bool(self.token) or self.amostragem > 0
+        self._contador = itertools.count(1)
+        # tracemalloc é global ao processo: um perfil por vez
+        self._lock = threading.Lock()
+
+    def autorizado(self, token):
+        """Compara o token do cabeçalho com o de administrador"""
+        if not self.token or not token:
+            return False
+        # Em bytes: compare_digest recusa str com caracteres fora do ASCII
+        return hmac.compare_digest(token.encode('utf-8'), self.token.encode('utf-8'))
+
+    def motivo(self, token):
+        """Retorna 'cabecalho', 'amostragem' ou None se a requisição não deve ser perfilada"""
+        if self.autorizado(token):
+            return 'cabecalho'
+        if self.amostragem > 0 and next(self._contador) % self.amostragem == 0:
+            return 'amostragem'
+        return None
+
+    def executar(self, dados, motivo, funcao, *args):
+        """
+        Executa funcao(*args) sob cProfile e tracemalloc. Retorna o resultado
+        e o nome do perfil gravado (None se outro perfil estava em andamento)
+        """
+        if not self._lock.acquire(blocking=False):
+            return funcao(*args), None
+        try:
+            perfil = cProfile.Profile()
+            tracemalloc.start()
+            inicio = time.perf_counter()
+            try:
+                resultado = perfil.runcall(funcao, *args)
+            finally:
+                duracao = time.perf_counter() - inicio
+                instantaneo = tracemalloc.take_snapshot()
+                _, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            nome = self._salvar(dados, motivo, perfil, instantaneo, duracao, pico)
+            return resultado, nome
+        finally:
+            self._lock.release()
+
+    def _salvar(self, dados, motivo, perfil, instantaneo, duracao, pico):
+        """Grava .prof, .txt e .json com o mesmo prefixo"""
+        agora = datetime.now(timezone.utc)
+        hash_dados = hash_questionario(dados)
+        nome = f"{agora.strftime('%Y%m%dT%H%M%S%f')}-{hash_dados}"
+        base = os.path.join(self.diretorio, nome)
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            perfil.dump_stats(base + '.prof')
+
+            relatorio = io.StringIO()
+            relatorio.write(f"Questionário {hash_dados} ({motivo}): {duracao * 1000:.1f} ms, "
+                            f"pico de memória {pico / 1024:.1f} KB\n\n")
+            pstats.Stats(perfil, stream=relatorio).sort_stats('cumulative').print_stats(Config.PERFIL_TOP_FUNCOES)
+            relatorio.write(f"\nMaiores alocações (top {Config.PERFIL_TOP_ALOCACOES}):\n")
+            for estatistica in instantaneo.statistics('lineno')[:Config.PERFIL_TOP_ALOCACOES]:
+                relatorio.write(f"{estatistica}\n")
+            with open(base + '.txt', 'w', encoding='utf-8') as f:
+                f.write(relatorio.getvalue())
+
+            with open(base + '.json', 'w', encoding='utf-8') as f:
+                json.dump({
+                    'nome': nome,
+                    'hash_questionario': hash_dados,
+                    'motivo': motivo,
+                    'criado_em': agora.isoformat(),
+                    'duracao_ms': round(duracao * 1000, 3),
+                    'pico_memoria_bytes': pico,
+                    'questionario': dados
+                }, f, ensure_ascii=False, default=str)
+
+            self._limpar()
+            logger.info(f"Perfil gravado: {nome} ({motivo}, {duracao * 1000:.1f} ms)")
+            return nome
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o perfil: {str(e)}")
+            return None
+
+    def _limpar(self):
+        """Mantém apenas os perfis mais recentes"""
+        nomes = sorted(n[:-5] for n in os.listdir(self.diretorio) if n.endswith('.json'))
+        for nome in nomes[:max(len(nomes) - Config.PERFIL_MANTER, 0)]:
+            for extensao in ('.json', '.prof', '.txt'):
+                try:
+                    os.remove(os.path.join(self.diretorio, nome + extensao))
+                except FileNotFoundError:
+                    pass
+
+    def listar(self):
+        """Metadados dos perfis gravados, do mais recente ao mais antigo"""
+        if not os.path.isdir(self.diretorio):
+            return []
+        perfis = []
+        for nome in sorted(os.listdir(self.diretorio), reverse=True):
+            if not nome.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.diretorio, nome), 'r', encoding='utf-8') as f:
+                    perfis.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return perfis
+
+    def caminho_arquivo(self, nome, extensao):
+        """Caminho de um arquivo de perfil, ou None se não existir"""
+        if extensao not in ('prof', 'txt', 'json') or os.path.basename(nome) != nome:
+            return None
+        caminho = os.path.join(self.diretorio, f'{nome}.{extensao}')
+        return caminho if os.path.isfile(caminho) else None
@@ -7,38 +7,48 @@ from services.regressao import RegressorPesos
 
 
 class SistemaRecomendacao:
-    """Integra classificação, agrupamento e regressão para gerar recomendações"""
+    """
+    Integra classificação, agrupamento e regressão para gerar recomendações.
+    Treina a Decision Tree e o K-Means a cada requisição; o caminho servido
+    pelas regras fica em services.motor.MotorRecomendacao.
+    """
     
-    def __init__(self, respostas, recursos):
+    def __init__(self, respostas, recursos, pesos=None, metricas_regressao=None):
+        """
+        recursos: catálogo completo (usado pela Decision Tree). `pesos` e
+        `metricas_regressao` podem vir de um snapshot do catálogo; sem eles a
+        regressão é treinada sobre `recursos`.
+        """
         self.respostas = respostas
         self.recursos = recursos
+        self.total_recursos = len(recursos)
+        self.pesos = pesos
+        self.metricas_regressao = metricas_regressao
         
         # Inicializa os três motores
         self.classificador = ClassificadorRecursos(respostas)
         self.agrupador = AgrupadorSimilaridade(respostas)
-        self.regressor = RegressorPesos()
+        self.regressor = RegressorPesos() if pesos is None else None
     
     def gerar_recomendacoes(self):
         """Pipeline completo de recomendação"""
-        # ETAPA 1: Treina regressão para obter pesos
-        pesos = self.regressor.treinar_regressao(self.recursos)
+        # ETAPA 1: Treina regressão para obter pesos (ou reutiliza os do catálogo)
+        if self.regressor is not None:
+            self.pesos = self.regressor.treinar_regressao(self.recursos)
+            self.metricas_regressao = self.regressor.obter_metricas()
+        pesos = dict(self.pesos)
+        metricas_regressao = dict(self.metricas_regressao)
         
         # ETAPA 2: Classificação - Filtra recursos elegíveis
         recursos_elegiveis = self.classificador.filtrar_recursos_elegiveis(self.recursos)
         
         if not recursos_elegiveis:
-            return {
-                'ranking': [],
-                'analises': {
-                    'totalRecursos': len(self.recursos),
-                    'recursosElegiveis': 0,
-                    'pesos_regressao': pesos,
-                    'metricas_regressao': self.regressor.obter_metricas()
-                }
-            }
+            return resultado_vazio(self.total_recursos, pesos, metricas_regressao)
         
         # ETAPA 3: Agrupamento - Agrupa recursos elegíveis
-        clusters_info = self.agrupador.agrupar_recursos(recursos_elegiveis, n_clusters=3)
+        clusters_info = self.agrupador.agrupar_recursos(
+            recursos_elegiveis, n_clusters=min(3, len(recursos_elegiveis))
+        )
         self.agrupador.nomes_clusters = self._nomear_clusters(clusters_info)
         
         # ETAPA 4: Calcula score final com pesos da regressão
@@ -72,10 +82,10 @@ class SistemaRecomendacao:
         # ETAPA 6: Retorna top 10
         ranking = recursos_com_score
         
-        analises = self._gerar_analises(recursos_com_score, len(self.recursos), pesos)
+        analises = gerar_analises(recursos_com_score, self.total_recursos, pesos, metricas_regressao)
         
         return {
-            'ranking': [self._formatar_resultado(r) for r in ranking],
+            'ranking': [formatar_resultado(r) for r in ranking],
             'analises': analises
         }
     
@@ -93,45 +103,60 @@ class SistemaRecomendacao:
             nomes[label] = cluster_names.get(label, f"Cluster {label}")
         
         return nomes
-    
-    def _gerar_analises(self, recursos_com_score, total_recursos, pesos):
-        """Gera estatísticas sobre o processo"""
-        if not recursos_com_score:
-            return {}
-        
-        scores_finais = [r['scoreFinal'] for r in recursos_com_score]
-        
-        return {
+
+
+def resultado_vazio(total_recursos, pesos, metricas_regressao):
+    """Resposta quando nenhum recurso é elegível"""
+    return {
+        'ranking': [],
+        'analises': {
             'totalRecursos': total_recursos,
-            'recursosElegiveis': len(recursos_com_score),
-            'taxaFiltragem': round(
-                ((total_recursos - len(recursos_com_score)) / total_recursos) * 100, 1
-            ),
-            'mediaScoreFinal': round(sum(scores_finais) / len(scores_finais), 3),
-            'medianaScoreFinal': round(sorted(scores_finais)[len(scores_finais) // 2], 3),
+            'recursosElegiveis': 0,
             'pesos_regressao': pesos,
-            'metricas_regressao': self.regressor.obter_metricas()
+            'metricas_regressao': metricas_regressao
         }
+    }
+
+
+def gerar_analises(recursos_com_score, total_recursos, pesos, metricas_regressao):
+    """Gera estatísticas sobre o processo"""
+    if not recursos_com_score:
+        return {}
     
-    def _formatar_resultado(self, resultado):
-        """Formata resultado para envio ao frontend"""
-        recurso = resultado['recurso']
-        
-        return {
-            'id': recurso.id,
-            'nome': recurso.nome,
-            'area': recurso.area,
-            'categoria': recurso.categoria,
-            'descricao': recurso.descricao,
-            'scoreFinal': resultado['scoreFinal'],
-            'cluster_id': resultado['cluster_id'],
-            'distancias': resultado['distancias'],
-            'caracteristicas': {
-                'facilidadeUso': recurso.facilidadeUso,
-                'engajamentoPotencial': recurso.engajamentoPotencial,
-                'adaptabilidadePedagogica': recurso.adaptabilidadePedagogica,
-                'requisitosInfraestrutura': recurso.requisitosInfraestrutura,
-                'custoAcessibilidade': recurso.custoAcessibilidade
-            },
-            'referencias': recurso.referencias
-        }
\ No newline at end of file
+    scores_finais = [r['scoreFinal'] for r in recursos_com_score]
+    
+    return {
+        'totalRecursos': total_recursos,
+        'recursosElegiveis': len(recursos_com_score),
+        'taxaFiltragem': round(
+            ((total_recursos - len(recursos_com_score)) / total_recursos) * 100, 1
+        ),
+        'mediaScoreFinal': round(sum(scores_finais) / len(scores_finais), 3),
+        'medianaScoreFinal': round(sorted(scores_finais)[len(scores_finais) // 2], 3),
+        'pesos_regressao': pesos,
+        'metricas_regressao': metricas_regressao
+    }
+
+
+def formatar_resultado(resultado):
+    """Formata resultado para envio ao frontend"""
+    recurso = resultado['recurso']
+
+    return {
+        'id': recurso.id,
+        'nome': recurso.nome,
+        'area': recurso.area,
+        'categoria': recurso.categoria,
+        'descricao': recurso.descricao,
+        'scoreFinal': resultado['scoreFinal'],
+        'cluster_id': resultado['cluster_id'],
+        'distancias': resultado['distancias'],
+        'caracteristicas': {
+            'facilidadeUso': recurso.facilidadeUso,
+            'engajamentoPotencial': recurso.engajamentoPotencial,
+            'adaptabilidadePedagogica': recurso.adaptabilidadePedagogica,
+            'requisitosInfraestrutura': recurso.requisitosInfraestrutura,
+            'custoAcessibilidade': recurso.custoAcessibilidade
+        },
+        'referencias': recurso.referencias
+    }
\ No newline at end of file
@@ -1,21 +1,50 @@
 """
 FUNÇÃO 3: REGRESSÃO LINEAR para Definir Pesos do Score Final
 Treina modelo de regressão para calcular importância de cada variável
+
+O modelo é mantido a partir de estatísticas suficientes (XᵀX, Xᵀy, somas
+das colunas), de modo que inserir, alterar ou remover um recurso atualiza
+os pesos em O(d²) sem percorrer novamente o catálogo.
 """
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import r2_score, mean_squared_error
+from config import Config
+from models.recursos import CARACTERISTICAS
 import numpy as np
 
+
 class RegressorPesos:
     """Regressão linear para definir pesos das 5 características"""
-    
-    def __init__(self):
-        self.modelo = None
-        self.scaler = StandardScaler()
+
+    def __init__(self, tipo=None, alpha=None):
+        self.tipo = tipo or Config.REGRESSAO_TIPO
+        if self.tipo not in ('linear', 'ridge', 'lasso'):
+            raise ValueError(f"Tipo de regressão desconhecido: {self.tipo}")
+        if alpha is None:
+            alpha = Config.REGRESSAO_ALPHA_LASSO if self.tipo == 'lasso' else Config.REGRESSAO_ALPHA
+        self.alpha = float(alpha)
         self.pesos_normalizados = {}
         self.metricas_regressao = {}
-    
+        self.coeficientes = None
+        self.intercepto = 0.0
+        self._zerar_estatisticas()
+
+    def _zerar_estatisticas(self):
+        """Inicializa as estatísticas suficientes do modelo"""
+        d = len(CARACTERISTICAS)
+        self.n = 0
+        self.soma_x = np.zeros(d)
+        self.xtx = np.zeros((d, d))
+        self.xty = np.zeros(d)
+        self.soma_y = 0.0
+        self.soma_y2 = 0.0
+
+    @staticmethod
+    def _vetor(recurso):
+        """Retorna (x, y) de um recurso"""
+        x = np.array(recurso.vetor_caracteristicas(), dtype=float)
+        # Target: adaptabilidade pedagógica (pode ser ajustado conforme necessidade)
+        y = float(getattr(recurso, Config.REGRESSAO_TARGET))
+        return x, y
+
     def treinar_regressao(self, recursos):
         """
         Treina regressão linear usando as 5 características
@@ -23,58 +52,206 @@ class RegressorPesos:
         """
         # Construir matriz X (5 características)
         X = np.array([
-            [r.facilidadeUso, r.engajamentoPotencial,
-             r.adaptabilidadePedagogica, r.requisitosInfraestrutura,
-             r.custoAcessibilidade]
-            for r in recursos
-        ])
-        
-        # Target: adaptabilidade pedagógica (pode ser ajustado conforme necessidade)
-        y = np.array([r.adaptabilidadePedagogica for r in recursos])
-        
-        # Normalizar features
-        X_scaled = self.scaler.fit_transform(X)
-        
-        # Treinar modelo
-        self.modelo = LinearRegression()
-        self.modelo.fit(X_scaled, y)
-        
+            r.vetor_caracteristicas() for r in recursos
+        ], dtype=float).reshape(-1, len(CARACTERISTICAS))
+        return self.treinar_features(X)
+
+    def treinar_features(self, X):
+        """Treina a partir da matriz n×5 de características (ordem de CARACTERISTICAS)"""
+        X = np.asarray(X, dtype=float)
+        y = X[:, CARACTERISTICAS.index(Config.REGRESSAO_TARGET)]
+
+        self._zerar_estatisticas()
+        self.n = len(y)
+        self.soma_x = X.sum(axis=0)
+        self.xtx = X.T @ X
+        self.xty = X.T @ y
+        self.soma_y = float(y.sum())
+        self.soma_y2 = float(y @ y)
+        self.coeficientes = None
+
+        return self._resolver()
+
+    def adicionar_recurso(self, recurso):
+        """Inclui um recurso nas estatísticas e atualiza os pesos"""
+        self._acumular(recurso, 1.0)
+        return self._resolver()
+
+    def remover_recurso(self, recurso):
+        """Retira um recurso das estatísticas e atualiza os pesos"""
+        self._acumular(recurso, -1.0)
+        return self._resolver()
+
+    def atualizar_recurso(self, anterior, novo):
+        """Substitui um recurso alterado nas estatísticas e atualiza os pesos"""
+        self._acumular(anterior, -1.0)
+        self._acumular(novo, 1.0)
+        return self._resolver()
+
+    def _acumular(self, recurso, sinal):
+        """Soma (sinal=1) ou subtrai (sinal=-1) a contribuição de um recurso"""
+        x, y = self._vetor(recurso)
+        self.n += int(sinal)
+        self.soma_x += sinal * x
+        self.xtx += sinal * np.outer(x, x)
+        self.xty += sinal * x * y
+        self.soma_y += sinal * y
+        self.soma_y2 += sinal * y * y
+
+    @property
+    def media(self):
+        """Média de cada característica"""
+        return self.soma_x / self.n if self.n else np.zeros_like(self.soma_x)
+
+    @property
+    def variancia(self):
+        """Variância populacional de cada característica"""
+        if not self.n:
+            return np.zeros_like(self.soma_x)
+        return np.maximum(np.diag(self.xtx) / self.n - self.media ** 2, 0.0)
+
+    @property
+    def desvio(self):
+        """Desvio padrão usado na padronização (1.0 para colunas constantes)"""
+        desvio = np.sqrt(self.variancia)
+        desvio[desvio < 1e-12] = 1.0
+        return desvio
+
+    def _resolver(self):
+        """Recalcula coeficientes, pesos e métricas a partir das estatísticas"""
+        if self.n < 2:
+            return self._usar_pesos_padrao()
+
+        # Estatísticas das features padronizadas (equivale ao StandardScaler)
+        media = self.media
+        desvio = self.desvio
+        media_y = self.soma_y / self.n
+        gram = (self.xtx - self.n * np.outer(media, media)) / np.outer(desvio, desvio)
+        cov_xy = (self.xty - self.n * media * media_y) / desvio
+        syy = max(self.soma_y2 - self.n * media_y ** 2, 0.0)
+
+        if self.tipo == 'lasso':
+            coeficientes = self._resolver_lasso(gram / self.n, cov_xy / self.n)
+        else:
+            alpha = self.alpha if self.tipo == 'ridge' else 0.0
+            matriz = gram + alpha * np.eye(len(CARACTERISTICAS))
+            coeficientes = np.linalg.lstsq(matriz, cov_xy, rcond=None)[0]
+
+        self.coeficientes = coeficientes
+        self.intercepto = float(media_y)
+
         # Calcular métricas
-        y_pred = self.modelo.predict(X_scaled)
-        r2 = r2_score(y, y_pred)
-        rmse = np.sqrt(mean_squared_error(y, y_pred))
-        
-        # Extrair coeficientes
-        coeficientes = self.modelo.coef_
-        
+        sse = max(syy - 2 * coeficientes @ cov_xy + coeficientes @ gram @ coeficientes, 0.0)
+        if syy > 0:
+            r2 = 1 - sse / syy
+        else:
+            r2 = 1.0 if sse < 1e-12 else 0.0
+        rmse = np.sqrt(sse / self.n)
+
         # Normalizar coeficientes para somar 1.0 (pesos percentuais)
         coef_abs = np.abs(coeficientes)
+        if np.sum(coef_abs) <= 0:
+            return self._usar_pesos_padrao()
         pesos_normalizados = coef_abs / np.sum(coef_abs)
-        
+
         # Mapear para nomes das características
         self.pesos_normalizados = {
-            'facilidadeUso': float(pesos_normalizados[0]),
-            'engajamentoPotencial': float(pesos_normalizados[1]),
-            'adaptabilidadePedagogica': float(pesos_normalizados[2]),
-            'requisitosInfraestrutura': float(pesos_normalizados[3]),
-            'custoAcessibilidade': float(pesos_normalizados[4])
+            nome: float(peso) for nome, peso in zip(CARACTERISTICAS, pesos_normalizados)
         }
-        
+
         self.metricas_regressao = {
+            'tipo': self.tipo,
+            'alpha': self.alpha if self.tipo != 'linear' else None,
+            'n_amostras': self.n,
             'r2_score': float(r2),
             'rmse': float(rmse),
             'coeficientes_brutos': coeficientes.tolist(),
             'pesos_normalizados': self.pesos_normalizados,
-            'intercepto': float(self.modelo.intercept_)
+            'intercepto': self.intercepto
         }
-        
+
         return self.pesos_normalizados
-    
+
+    def _resolver_lasso(self, gram, cov_xy, max_iter=1000, tol=1e-8):
+        """
+        Descida por coordenadas sobre a matriz de Gram, com partida a quente
+        nos coeficientes anteriores. Minimiza a mesma função objetivo do
+        sklearn.linear_model.Lasso: (1/2n)·||y - Xw||² + alpha·||w||₁
+        """
+        d = len(CARACTERISTICAS)
+        if self.coeficientes is not None and len(self.coeficientes) == d:
+            w = np.array(self.coeficientes, dtype=float)
+        else:
+            w = np.zeros(d)
+
+        for _ in range(max_iter):
+            maior_passo = 0.0
+            for j in range(d):
+                if gram[j, j] <= 0:
+                    continue
+                rho = cov_xy[j] - gram[j] @ w + gram[j, j] * w[j]
+                novo = np.sign(rho) * max(abs(rho) - self.alpha, 0.0) / gram[j, j]
+                maior_passo = max(maior_passo, abs(novo - w[j]))
+                w[j] = novo
+            if maior_passo < tol:
+                break
+        return w
+
+    def _usar_pesos_padrao(self):
+        """Recorre aos pesos padrão quando não há dados suficientes"""
+        self.pesos_normalizados = dict(Config.PESOS_REGRESSAO_PADRAO)
+        self.metricas_regressao = {
+            'tipo': self.tipo,
+            'alpha': self.alpha if self.tipo != 'linear' else None,
+            'n_amostras': self.n,
+            'r2_score': None,
+            'rmse': None,
+            'coeficientes_brutos': [],
+            'pesos_normalizados': self.pesos_normalizados,
+            'intercepto': self.intercepto,
+            'pesos_padrao': True
+        }
+        return self.pesos_normalizados
+
+    def exportar_estado(self):
+        """Estatísticas suficientes, coeficientes e métricas (para o cache em disco)"""
+        return {
+            'tipo': self.tipo,
+            'alpha': self.alpha,
+            'n': self.n,
+            'soma_y': self.soma_y,
+            'soma_y2': self.soma_y2,
+            'intercepto': self.intercepto,
+            'pesos_normalizados': self.pesos_normalizados,
+            'metricas_regressao': self.metricas_regressao,
+            'soma_x': self.soma_x,
+            'xtx': self.xtx,
+            'xty': self.xty,
+            'coeficientes': self.coeficientes if self.coeficientes is not None else np.zeros(0)
+        }
+
+    def restaurar_estado(self, estado):
+        """Recarrega o estado exportado sem treinar novamente"""
+        if (estado['tipo'], estado['alpha']) != (self.tipo, self.alpha):
+            raise ValueError("Estado de regressão com tipo ou alpha diferente")
+        self.n = int(estado['n'])
+        self.soma_y = float(estado['soma_y'])
+        self.soma_y2 = float(estado['soma_y2'])
+        self.intercepto = float(estado['intercepto'])
+        # Cópias graváveis: as atualizações incrementais alteram os arrays
+        self.soma_x = np.array(estado['soma_x'], dtype=float)
+        self.xtx = np.array(estado['xtx'], dtype=float)
+        self.xty = np.array(estado['xty'], dtype=float)
+        coeficientes = np.array(estado['coeficientes'], dtype=float)
+        self.coeficientes = coeficientes if len(coeficientes) else None
+        self.pesos_normalizados = dict(estado['pesos_normalizados'])
+        self.metricas_regressao = dict(estado['metricas_regressao'])
+        self.metricas_regressao['pesos_normalizados'] = self.pesos_normalizados
+
     def obter_pesos(self):
         """Retorna os pesos normalizados"""
         return self.pesos_normalizados
-    
+
     def obter_metricas(self):
         """Retorna métricas da regressão"""
         return self.metricas_regressao
-
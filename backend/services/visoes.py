@@ -0,0 +1,303 @@
+"""
+VISÕES MATERIALIZADAS DE ELEGIBILIDADE
+As regras de negócio dependem apenas de disciplina, modalidade, necessidade
+de avaliação e de dois limiares (familiaridade e conectividade). Para cada
+combinação desse espaço finito, pré-calcula os recursos elegíveis já
+ranqueados pelos pesos da regressão e agrupados pelo K-Means.
+"""
+import itertools
+import logging
+import threading
+import time
+
+import numpy as np
+
+from config import Config
+from models.questionario import RespostasQuestionario
+from models.recursos import AREA_MULTIDISCIPLINAR, CARACTERISTICAS
+from services.agrupamento import AgrupadorSimilaridade
+from services.motor import SnapshotDesatualizado
+
+logger = logging.getLogger(__name__)
+
+
+def calcular_scores(X, pesos):
+    """
+    scoreFinal arredondado a 4 casas, idêntico a round(score, 4) do cálculo
+    recurso a recurso. O arredondamento é vetorizado; só os scores a menos de
+    alguns ulps de uma fronteira (onde a multiplicação por 1e4 pode mudar o
+    lado) são arredondados com round()
+    """
+    # Mesma ordem de operações do score calculado recurso a recurso
+    score = X[:, 0] * pesos[CARACTERISTICAS[0]]
+    for j in range(1, len(CARACTERISTICAS)):
+        score = score + X[:, j] * pesos[CARACTERISTICAS[j]]
+
+    escalado = score * 1e4
+    scores = np.rint(escalado) / 1e4
+    janela = 4 * np.finfo(np.float64).eps * np.abs(escalado)
+    for i in np.flatnonzero(np.abs(escalado - np.floor(escalado) - 0.5) <= janela):
+        scores[i] = round(float(score[i]), 4)
+    return scores
+
+
+class VisaoElegibilidade:
+    """Recursos elegíveis de uma chave, em ordem de ranking"""
+
+    __slots__ = ('chave', 'versao', 'ids', 'scores', 'clusters', 'pesos', 'metricas_regressao')
+
+    def __init__(self, chave, versao, ids, scores, clusters, pesos, metricas_regressao):
+        self.chave = chave
+        self.versao = versao
+        self.ids = ids
+        self.scores = scores
+        self.clusters = clusters
+        self.pesos = pesos
+        self.metricas_regressao = metricas_regressao
+
+    def memoria_bytes(self):
+        return self.ids.nbytes + self.scores.nbytes + self.clusters.nbytes
+
+
+class VisoesElegibilidade:
+    """
+    Tabela chave -> VisaoElegibilidade, reconstruída por uma thread de fundo
+    sempre que o catálogo muda. Chaves ainda não construídas para a versão
+    atual são calculadas sob demanda na própria requisição.
+    """
+
+    def __init__(self, catalogo):
+        self.catalogo = catalogo
+        self.repositorio = catalogo.repositorio
+        self._visoes = {}
+        self._dominio = (None, (), ())
+        self._lock = threading.Lock()
+        self._pendente = threading.Event()
+        self._parado = False
+        self._estatisticas = {
+            'acertos': 0,
+            'faltas': 0,
+            'versao_construida': None,
+            'tempo_construcao_s': None,
+            'erro_construcao': None
+        }
+
+    def iniciar(self):
+        """Inicia a thread de fundo que materializa todas as chaves"""
+        self._pendente.set()
+        threading.Thread(target=self._executar, name='visoes-elegibilidade', daemon=True).start()
+
+    def invalidar(self):
+        """Chamado pelo catálogo depois de publicar um novo motor"""
+        self._pendente.set()
+
+    def parar(self):
+        """Encerra a thread de fundo (catálogo descarregado)"""
+        self._parado = True
+        self._pendente.set()
+
+    def _obter_dominio(self, versao):
+        """Áreas e modalidades presentes no catálogo (em cache por versão)"""
+        dominio = self._dominio
+        if dominio[0] != versao:
+            with self.repositorio.leitura_consistente() as versao_lida:
+                if versao_lida != versao:
+                    raise SnapshotDesatualizado(versao, versao_lida)
+                dominio = (
+                    versao,
+                    frozenset(self.repositorio.obter_valores('area')),
+                    frozenset(self.repositorio.obter_valores('modalidades'))
+                )
+            self._dominio = dominio
+        return dominio[1], dominio[2]
+
+    def chave(self, respostas, versao=None):
+        """Reduz as respostas à chave das regras de elegibilidade"""
+        areas, modalidades = self._obter_dominio(
+            self.catalogo.versao if versao is None else versao
+        )
+        disciplina = respostas.disciplina
+        if disciplina not in areas or disciplina == AREA_MULTIDISCIPLINAR:
+            disciplina = None
+        modalidade = respostas.modalidade if respostas.modalidade in modalidades else None
+        return (
+            disciplina,
+            modalidade,
+            bool(respostas.necessidadeAvaliacao),
+            respostas.familiaridadeTech < Config.LIMIAR_FAMILIARIDADE_BAIXA,
+            respostas.conectividade < Config.LIMIAR_CONECTIVIDADE_BAIXA
+        )
+
+    def chaves(self, versao):
+        """Enumera todas as chaves possíveis para o catálogo atual"""
+        areas, modalidades = self._obter_dominio(versao)
+        disciplinas = sorted(a for a in areas if a != AREA_MULTIDISCIPLINAR)
+        return list(itertools.product(
+            disciplinas + [None], sorted(modalidades) + [None],
+            [False, True], [False, True], [False, True]
+        ))
+
+    def obter(self, respostas, motor=None):
+        """Retorna a visão correspondente às respostas no snapshot `motor`"""
+        return self._obter(respostas, motor or self.catalogo.motor)[0]
+
+    def obter_recursos(self, respostas, motor, limite=None):
+        """
+        Visão das respostas no snapshot `motor` e os recursos dos seus ids (os
+        `limite` primeiros), lidos na versão do motor. Levanta
+        SnapshotDesatualizado se o repositório já estiver em outra versão
+        """
+        visao, recursos = self._obter(respostas, motor)
+        if recursos is None:
+            ids = visao.ids if limite is None else visao.ids[:limite]
+            with self.repositorio.leitura_consistente() as versao:
+                if versao != motor.versao:
+                    raise SnapshotDesatualizado(motor.versao, versao)
+                recursos = self.repositorio.obter_por_ids(ids.tolist())
+        return visao, recursos[:limite]
+
+    def _obter(self, respostas, motor):
+        """(visão, recursos já lidos na construção ou None se a visão estava pronta)"""
+        versao = motor.versao
+        chave = self.chave(respostas, versao)
+        visao = self._visoes.get(chave)
+        if visao is not None and visao.versao == versao:
+            with self._lock:
+                self._estatisticas['acertos'] += 1
+            return visao, None
+
+        with self._lock:
+            self._estatisticas['faltas'] += 1
+        visao, recursos = self._construir(chave, motor)
+        with self._lock:
+            atual = self._visoes.get(chave)
+            if atual is None or atual.versao <= versao:
+                self._visoes[chave] = visao
+        return visao, recursos
+
+    def _construir(self, chave, motor):
+        """
+        Calcula a visão de uma chave a partir da pré-filtragem do repositório
+        e retorna (visão, recursos na ordem do ranking). Os candidatos têm de
+        estar na versão do motor (os pesos são dele): caso contrário levanta
+        SnapshotDesatualizado em vez de misturar versões
+        """
+        disciplina, modalidade, avaliacao, familiaridade_baixa, conectividade_baixa = chave
+        representante = RespostasQuestionario({
+            'disciplina': disciplina,
+            'modalidade': modalidade,
+            'necessidadeAvaliacao': avaliacao,
+            'familiaridadeTech': 0.0 if familiaridade_baixa else 1.0,
+            'conectividade': 0.0 if conectividade_baixa else 1.0
+        })
+        with self.repositorio.leitura_consistente() as versao:
+            if versao != motor.versao:
+                raise SnapshotDesatualizado(motor.versao, versao)
+            candidatos, X = self.repositorio.obter_candidatos(representante)
+        pesos = motor.pesos
+        scores = calcular_scores(X, pesos)
+
+        if candidatos:
+            clusters_info = AgrupadorSimilaridade(None).agrupar_recursos(
+                candidatos, n_clusters=min(3, len(candidatos))
+            )
+            labels = np.asarray(clusters_info['labels'], dtype=np.int8)
+        else:
+            labels = np.zeros(0, dtype=np.int8)
+
+        ordem = np.argsort(-scores, kind='stable')
+        ids = np.array([r.id for r in candidatos], dtype=np.int64)[ordem]
+        scores, labels = scores[ordem], labels[ordem]
+        # Compartilhadas entre threads: somente leitura
+        for array in (ids, scores, labels):
+            array.flags.writeable = False
+        visao = VisaoElegibilidade(chave, motor.versao, ids, scores, labels, pesos, motor.metricas_regressao)
+        return visao, [candidatos[i] for i in ordem]
+
+    def exportar(self, versao):
+        """Visões de uma versão em arrays concatenados (para o cache em disco)"""
+        visoes = [v for v in list(self._visoes.values()) if v.versao == versao]
+        limites = np.cumsum([0] + [len(v.ids) for v in visoes])
+
+        def concatenar(campo, dtype):
+            return np.concatenate([getattr(v, campo) for v in visoes] + [np.zeros(0, dtype=dtype)])
+
+        return {
+            'chaves': [list(v.chave) for v in visoes],
+            'limites': limites.astype(np.int64),
+            'ids': concatenar('ids', np.int64),
+            'scores': concatenar('scores', np.float64),
+            'clusters': concatenar('clusters', np.int8)
+        }
+
+    def restaurar(self, estado, motor):
+        """Recarrega visões exportadas como fatias dos arrays em memory-map"""
+        limites = estado['limites']
+        with self._lock:
+            for i, chave in enumerate(estado['chaves']):
+                chave = tuple(chave)
+                inicio, fim = int(limites[i]), int(limites[i + 1])
+                self._visoes[chave] = VisaoElegibilidade(
+                    chave, motor.versao, estado['ids'][inicio:fim], estado['scores'][inicio:fim],
+                    estado['clusters'][inicio:fim], motor.pesos, motor.metricas_regressao
+                )
+
+    def _executar(self):
+        """Thread de fundo: reconstrói todas as visões a cada alteração do catálogo"""
+        while True:
+            self._pendente.wait()
+            if self._parado:
+                return
+            self._pendente.clear()
+            try:
+                self.construir_todas()
+            except SnapshotDesatualizado:
+                # O catálogo publica o próximo motor e invalida as visões
+                continue
+            except Exception as e:
+                logger.error(f"Erro ao construir visões de elegibilidade: {str(e)}", exc_info=True)
+                with self._lock:
+                    self._estatisticas['erro_construcao'] = f"{type(e).__name__}: {e}"
+
+    def construir_todas(self):
+        """Materializa todas as chaves para a versão atual do catálogo"""
+        inicio = time.perf_counter()
+        motor = self.catalogo.motor
+        versao = motor.versao
+        chaves = self.chaves(versao)
+        for chave in chaves:
+            if self.catalogo.motor is not motor:
+                # Catálogo mudou durante a construção: recomeça na próxima volta
+                return
+            atual = self._visoes.get(chave)
+            if atual is not None and atual.versao == versao:
+                continue
+            visao, _ = self._construir(chave, motor)
+            with self._lock:
+                self._visoes[chave] = visao
+
+        with self._lock:
+            # Descarta chaves que deixaram de existir (ex.: área removida)
+            validas = set(chaves)
+            for chave in [c for c in self._visoes if c not in validas]:
+                del self._visoes[chave]
+            self._estatisticas['versao_construida'] = versao
+            self._estatisticas['tempo_construcao_s'] = round(time.perf_counter() - inicio, 3)
+            self._estatisticas['erro_construcao'] = None
+        self.catalogo.visoes_construidas(motor)
+        estatisticas = self.obter_estatisticas()
+        logger.info(
+            f"Visões de elegibilidade materializadas: {estatisticas['n_visoes']} visões, "
+            f"{estatisticas['memoria_bytes'] / 1024:.1f} KB em {estatisticas['tempo_construcao_s']}s"
+        )
+
+    def obter_estatisticas(self):
+        """Tamanho, uso de memória e taxa de acerto das visões"""
+        with self._lock:
+            visoes = list(self._visoes.values())
+            estatisticas = dict(self._estatisticas)
+        return {
+            'n_visoes': len(visoes),
+            'memoria_bytes': int(sum(v.memoria_bytes() for v in visoes)),
+            **estatisticas
+        }
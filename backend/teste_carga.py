@@ -0,0 +1,269 @@
+"""
+Teste de carga da API de recomendações
+
+Dispara requisições POST /api/recomendacoes com respostas sorteadas de uma
+distribuição realista do questionário, com concorrência configurável, e
+reporta vazão, percentis de latência e taxa de erros em JSON.
+
+Alvos:
+    - interno: aplicação Flask no próprio processo (test client)
+    - --url: servidor já em execução (ex.: http://localhost:5000)
+
+Uso:
+    python teste_carga.py -c 8 -d 30
+    python teste_carga.py --catalogo-sintetico 20000 -c 4 -n 2000
+    python teste_carga.py --url http://localhost:5000 -c 16 -d 60
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+from config import Config
+from dados_sinteticos import gerar_catalogo_sintetico, sortear_respostas
+
+class ClienteInterno:
+    """Envia requisições ao app Flask do próprio processo"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def enviar(self, caminho, corpo):
+        cliente = getattr(self._local, 'cliente', None)
+        if cliente is None:
+            cliente = self._local.cliente = self.app.test_client()
+        resposta = cliente.post(caminho, json=corpo)
+        resposta.get_data()
+        return resposta.status_code
+
+
+class ClienteHTTP:
+    """Envia requisições a um servidor HTTP em execução"""
+
+    def __init__(self, url, timeout):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def enviar(self, caminho, corpo):
+        requisicao = urllib.request.Request(
+            self.url + caminho, data=json.dumps(corpo).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        try:
+            with urllib.request.urlopen(requisicao, timeout=self.timeout) as resposta:
+                resposta.read()
+                return resposta.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def percentil(ordenados, p):
+    """Percentil por posto mais próximo (ceil(p/100·n)-ésimo valor) de uma lista já ordenada"""
+    if not ordenados:
+        return None
+    posicao = max(math.ceil(p / 100 * len(ordenados)) - 1, 0)
+    return ordenados[min(posicao, len(ordenados) - 1)]
+
+
+def executar_carga(cliente, concorrencia, duracao=None, total=None, semente=42, caminho='/api/recomendacoes'):
+    """
+    Dispara requisições com `concorrencia` threads até atingir `total`
+    requisições ou `duracao` segundos. Retorna as medições brutas.
+    """
+    latencias = []
+    status = Counter()
+    excecoes = Counter()
+    lock = threading.Lock()
+    contador = iter(range(total)) if total else None
+    fim = time.perf_counter() + duracao if duracao else None
+
+    def trabalhador(indice):
+        rng = random.Random(semente + indice)
+        while True:
+            if fim is not None and time.perf_counter() >= fim:
+                return
+            if contador is not None:
+                with lock:
+                    if next(contador, None) is None:
+                        return
+            corpo = sortear_respostas(rng)
+            inicio = time.perf_counter()
+            try:
+                codigo = cliente.enviar(caminho, corpo)
+                erro = None
+            except Exception as e:
+                codigo, erro = None, type(e).__name__
+            decorrido = time.perf_counter() - inicio
+            with lock:
+                latencias.append(decorrido)
+                if erro:
+                    excecoes[erro] += 1
+                else:
+                    status[codigo] += 1
+
+    threads = [threading.Thread(target=trabalhador, args=(i,)) for i in range(concorrencia)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencias, status, excecoes, time.perf_counter() - inicio
+
+
+def gerar_relatorio(latencias, status, excecoes, duracao):
+    """Resume as medições em vazão, percentis (ms) e taxa de erros"""
+    ordenados = sorted(latencias)
+    n = len(ordenados)
+    falhas = sum(excecoes.values()) + sum(q for c, q in status.items() if c >= 400)
+
+    def ms(valor):
+        return round(valor * 1000, 3) if valor is not None else None
+
+    return {
+        'requisicoes': n,
+        'duracao_s': round(duracao, 3),
+        'vazao_rps': round(n / duracao, 2) if duracao > 0 else None,
+        'latencia_ms': {
+            'media': ms(sum(ordenados) / n) if n else None,
+            'p50': ms(percentil(ordenados, 50)),
+            'p95': ms(percentil(ordenados, 95)),
+            'p99': ms(percentil(ordenados, 99)),
+            'max': ms(ordenados[-1]) if n else None
+        },
+        'erros': {
+            'total': falhas,
+            'taxa': round(falhas / n, 4) if n else 0.0,
+            'por_status': {str(c): q for c, q in sorted(status.items())},
+            'excecoes': dict(excecoes)
+        }
+    }
+
+
+def _preparar_app_interno(args, rng):
+    """
+    Importa o app (opcionalmente sobre um catálogo sintético) e, no modo
+    'regras', aguarda as visões que servem as recomendações
+    """
+    import logging
+    if args.catalogo_sintetico:
+        diretorio = tempfile.mkdtemp(prefix='carga-')
+        caminho = os.path.join(diretorio, 'recursos_base.json')
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(gerar_catalogo_sintetico(args.catalogo_sintetico, rng), f, ensure_ascii=False)
+        Config.RECURSOS_JSON = caminho
+        Config.RECURSOS_SQLITE = os.path.join(diretorio, 'recursos.sqlite3')
+
+    inicio = time.perf_counter()
+    import app as aplicacao
+    logging.getLogger().setLevel(logging.WARNING)
+    carga_catalogo = time.perf_counter() - inicio
+
+    pacote = aplicacao.catalogos.obter(Config.CATALOGO_PADRAO)
+    preparo = {
+        'tempo_carga_catalogo_s': round(carga_catalogo, 3),
+        'total_recursos': pacote.repositorio.contar()
+    }
+    # Só o modo 'regras' lê as visões (no modo 'arvore' nem são construídas)
+    if args.aguardar_visoes and Config.CLASSIFICACAO_MODO == 'regras':
+        limite = time.perf_counter() + args.timeout_visoes
+        while True:
+            estatisticas = pacote.catalogo.visoes.obter_estatisticas()
+            if estatisticas['versao_construida'] is not None:
+                break
+            if estatisticas['erro_construcao']:
+                raise RuntimeError(f"Falha ao construir as visões: {estatisticas['erro_construcao']}")
+            if time.perf_counter() > limite:
+                raise TimeoutError(f"Visões não construídas em {args.timeout_visoes}s")
+            time.sleep(0.05)
+        preparo['tempo_ate_visoes_s'] = round(time.perf_counter() - inicio, 3)
+    return aplicacao.app, preparo
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description='Teste de carga de POST /api/recomendacoes')
+    parser.add_argument('--url', help='Servidor alvo (padrão: app Flask no próprio processo)')
+    parser.add_argument('-c', '--concorrencia', type=int, default=4, help='Threads clientes (padrão: 4)')
+    limite = parser.add_mutually_exclusive_group()
+    limite.add_argument('-d', '--duracao', type=float, help='Duração em segundos')
+    limite.add_argument('-n', '--requisicoes', type=int, help='Total de requisições (padrão: 1000)')
+    parser.add_argument('--aquecimento', type=int, default=50, help='Requisições descartadas antes da medição')
+    parser.add_argument('--catalogo-sintetico', type=int, metavar='N',
+                        help='Gera um catálogo com N recursos (apenas no alvo interno)')
+    parser.add_argument('--gerar-catalogo', type=int, metavar='N',
+                        help='Apenas grava um catálogo sintético com N recursos em --saida-catalogo e sai')
+    parser.add_argument('--saida-catalogo', default='recursos_sinteticos.json')
+    parser.add_argument('--sem-aguardar-visoes', dest='aguardar_visoes', action='store_false',
+                        help='Mede também o período de construção das visões de elegibilidade '
+                             '(só no modo regras; no modo arvore não há visões a aguardar)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Timeout HTTP em segundos')
+    parser.add_argument('--timeout-visoes', type=float, default=600.0,
+                        help='Espera máxima pela construção das visões, em segundos (padrão: 600)')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('-o', '--saida', help='Grava o relatório JSON neste arquivo')
+    return parser
+
+
+def main():
+    args = criar_parser().parse_args()
+    rng = random.Random(args.semente)
+
+    if args.gerar_catalogo:
+        with open(args.saida_catalogo, 'w', encoding='utf-8') as f:
+            json.dump(gerar_catalogo_sintetico(args.gerar_catalogo, rng), f, ensure_ascii=False)
+        print(f"Catálogo com {args.gerar_catalogo} recursos gravado em {args.saida_catalogo}", file=sys.stderr)
+        return
+
+    if args.url:
+        if args.catalogo_sintetico:
+            criar_parser().error('--catalogo-sintetico só se aplica ao alvo interno; use --gerar-catalogo')
+        cliente = ClienteHTTP(args.url, args.timeout)
+        preparo = {}
+    else:
+        try:
+            app, preparo = _preparar_app_interno(args, rng)
+        except (RuntimeError, TimeoutError) as e:
+            sys.exit(str(e))
+        cliente = ClienteInterno(app)
+
+    if args.aquecimento:
+        executar_carga(cliente, args.concorrencia, total=args.aquecimento, semente=args.semente + 10_000)
+
+    total = args.requisicoes if args.requisicoes or args.duracao else 1000
+    latencias, status, excecoes, duracao = executar_carga(
+        cliente, args.concorrencia, duracao=args.duracao, total=total, semente=args.semente
+    )
+
+    relatorio = {
+        'alvo': args.url or 'interno',
+        'concorrencia': args.concorrencia,
+        'catalogo_sintetico': args.catalogo_sintetico,
+        # Configuração do app medido (desconhecida para um servidor externo)
+        'classificacao_modo': None if args.url else Config.CLASSIFICACAO_MODO,
+        'repositorio_backend': None if args.url else Config.REPOSITORIO_BACKEND,
+        'ambiente': {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count()
+        },
+        **preparo,
+        **gerar_relatorio(latencias, status, excecoes, duracao)
+    }
+    saida = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(saida + '\n')
+    print(saida)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Processamento em lote: as recomendações seguem o modo de classificação e
+coincidem com as do pipeline da API
+"""
+import json
+import shutil
+
+import pytest
+
+from config import Config
+from models.questionario import RespostasQuestionario
+from models.recursos import RecursosRepository
+from recomendar_lote import criar_parser, processar
+from services.catalogo import CatalogoRecursos
+from services.recomendacao import SistemaRecomendacao
+
+RESPOSTAS = [
+    {'disciplina': 'Física', 'modalidade': 'hibrida', 'familiaridadeTech': 0.2, 'conectividade': 0.39},
+    {'disciplina': 'Matemática', 'modalidade': 'presencial', 'familiaridadeTech': 0.9,
+     'conectividade': 0.9, 'necessidadeAvaliacao': True},
+    {'disciplina': 'Multidisciplinar', 'modalidade': 'remota', 'familiaridadeTech': 0.5},
+]
+
+
+@pytest.fixture
+def caminho_catalogo(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'CACHE_ARTEFATOS_ATIVO', False)
+    caminho = tmp_path / 'recursos_base.json'
+    shutil.copy(Config.RECURSOS_JSON, caminho)
+    return caminho
+
+
+def executar_lote(tmp_path, caminho_catalogo, modo, top_k):
+    entrada = tmp_path / 'respostas.jsonl'
+    entrada.write_text(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in RESPOSTAS), encoding='utf-8')
+    saida = tmp_path / f'recomendacoes_{modo}.jsonl'
+    args = criar_parser().parse_args([
+        str(entrada), '-o', str(saida), '-k', str(top_k), '-p', '1', '-q',
+        '--backend', 'json', '--catalogo', str(caminho_catalogo), '--modo', modo
+    ])
+    assert processar(args) == (len(RESPOSTAS), 0)
+    return [json.loads(linha)['recomendacoes'] for linha in saida.read_text(encoding='utf-8').splitlines()]
+
+
+def resumo(recomendacoes):
+    return [(r['id'], r['scoreFinal'], r['cluster_id']) for r in recomendacoes]
+
+
+@pytest.mark.parametrize('top_k', [5, 100])
+def test_lote_modo_arvore_igual_ao_pipeline(tmp_path, caminho_catalogo, top_k):
+    obtidas = executar_lote(tmp_path, caminho_catalogo, 'arvore', top_k)
+
+    catalogo = CatalogoRecursos(RecursosRepository(caminho_catalogo), iniciar_visoes=False)
+    motor = catalogo.motor
+    for dados, recomendacoes in zip(RESPOSTAS, obtidas):
+        ranking = SistemaRecomendacao(
+            RespostasQuestionario(dados), catalogo.repositorio.obter_todos(),
+            pesos=motor.pesos, metricas_regressao=motor.metricas_regressao
+        ).gerar_recomendacoes()['ranking']
+        assert resumo(recomendacoes) == resumo(ranking[:top_k])
+
+
+def test_lote_modo_regras_igual_as_visoes(tmp_path, caminho_catalogo):
+    obtidas = executar_lote(tmp_path, caminho_catalogo, 'regras', 100)
+
+    catalogo = CatalogoRecursos(RecursosRepository(caminho_catalogo), iniciar_visoes=False)
+    for dados, recomendacoes in zip(RESPOSTAS, obtidas):
+        ranking = catalogo.consultar(lambda motor: motor.recomendar(RespostasQuestionario(dados)))['ranking']
+        assert resumo(recomendacoes) == resumo(ranking)
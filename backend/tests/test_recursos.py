@@ -0,0 +1,107 @@
+"""
+Repositório JSON: validação das escritas e reaplicação do log de alterações
+com entradas inválidas ou incompletas
+"""
+import json
+
+import pytest
+
+from models.recursos import RecursoTecnologico, RecursosRepository
+
+
+def dados_recurso(recurso_id, **alteracoes):
+    return {
+        'id': recurso_id,
+        'nome': f'Recurso {recurso_id}',
+        'area': 'Matemática',
+        'categoria': 'Simulação',
+        'descricao': 'Descrição',
+        'facilidadeUso': 0.8,
+        'engajamentoPotencial': 0.7,
+        'adaptabilidadePedagogica': 0.6,
+        'requisitosInfraestrutura': 0.5,
+        'custoAcessibilidade': 0.9,
+        'tags': ['geometria'],
+        'modalidades': ['presencial'],
+        'dispositivos': ['computador'],
+        'avaliacao': True,
+        'offline': False,
+        'referencias': [],
+        **alteracoes
+    }
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    caminho = tmp_path / 'recursos_base.json'
+    caminho.write_text(json.dumps([dados_recurso(i) for i in (1, 2, 3)]), encoding='utf-8')
+    return caminho
+
+
+def linha_log(entrada):
+    return (json.dumps(entrada, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+@pytest.mark.parametrize('alteracao', [
+    {'area': ['x']},
+    {'nome': 1},
+    {'descricao': None},
+    {'tags': [1]},
+    {'modalidades': 'presencial'},
+    {'referencias': [None]},
+])
+def test_validar_rejeita_tipos_invalidos(alteracao):
+    with pytest.raises(ValueError):
+        RecursoTecnologico.validar(dados_recurso(1, **alteracao))
+
+
+def test_escrita_invalida_nao_chega_ao_log(caminho):
+    repositorio = RecursosRepository(caminho)
+    with pytest.raises(ValueError):
+        repositorio.inserir(dados_recurso(None, area=['x']))
+    with pytest.raises(ValueError):
+        repositorio.atualizar(1, {'tags': [['aninhada']]})
+
+    assert repositorio.versao == 3
+    assert repositorio.contar() == 3
+    assert not repositorio.caminho_log.exists()
+    assert RecursosRepository(caminho).obter_por_id(1).tags == ['geometria']
+
+
+def test_reaplica_log_envenenado(caminho):
+    caminho_log = caminho.with_suffix('.changelog.jsonl')
+    conteudo = b''.join([
+        linha_log({'op': 'inserir', 'recurso': dados_recurso(10)}),
+        # Entradas gravadas antes da validação dos tipos
+        linha_log({'op': 'inserir', 'recurso': dados_recurso(11, area=['x'])}),
+        linha_log({'op': 'atualizar', 'recurso': dados_recurso(1, tags=[1])}),
+        linha_log({'op': 'atualizar', 'recurso': dados_recurso('2')}),
+        linha_log({'op': 'remover', 'id': [3]}),
+        b'nao e json\n',
+        linha_log({'op': 'atualizar', 'recurso': dados_recurso(2, nome='Atualizado')}),
+        # Escrita em andamento (ou interrompida)
+        b'{"op": "inserir", "recu'
+    ])
+    caminho_log.write_bytes(conteudo)
+
+    repositorio = RecursosRepository(caminho)
+    assert sorted(r.id for r in repositorio.obter_todos()) == [1, 2, 3, 10]
+    assert repositorio.obter_por_id(1).tags == ['geometria']
+    assert repositorio.obter_por_id(2).nome == 'Atualizado'
+    assert repositorio.obter_ids_por('area', 'Matemática') == {1, 2, 3, 10}
+    # Só leitura: a linha incompleta continua no arquivo
+    assert caminho_log.read_bytes() == conteudo
+
+    # A próxima escrita corta a linha incompleta e começa em linha nova
+    repositorio.inserir(dados_recurso(None))
+    linhas = caminho_log.read_bytes().split(b'\n')
+    assert linhas[-1] == b''
+    assert json.loads(linhas[-2])['recurso']['id'] == 11
+
+    recarregado = RecursosRepository(caminho)
+    assert [r.to_dict() for r in recarregado.obter_todos()] == [r.to_dict() for r in repositorio.obter_todos()]
+
+    repositorio.compactar()
+    assert caminho_log.read_bytes() == b''
+    assert [r.to_dict() for r in RecursosRepository(caminho).obter_todos()] == \
+        [r.to_dict() for r in repositorio.obter_todos()]
@@ -0,0 +1,104 @@
+"""
+Visões de elegibilidade: ranking, scoreFinal e clusters iguais aos do
+cálculo recurso a recurso (round(score, 4) em float64) em um catálogo sintético
+"""
+import itertools
+import json
+import random
+
+import numpy as np
+import pytest
+
+from config import Config
+from dados_sinteticos import gerar_catalogo_sintetico
+from models.questionario import RespostasQuestionario
+from models.recursos import CARACTERISTICAS, RecursosRepository
+from models.recursos_sqlite import RecursosRepositorySQLite
+from services.agrupamento import AgrupadorSimilaridade
+from services.catalogo import CatalogoRecursos
+from services.visoes import calcular_scores
+
+
+def score_por_recurso(recurso, pesos):
+    """Score na mesma ordem de operações do SistemaRecomendacao"""
+    score = getattr(recurso, CARACTERISTICAS[0]) * pesos[CARACTERISTICAS[0]]
+    for c in CARACTERISTICAS[1:]:
+        score = score + getattr(recurso, c) * pesos[c]
+    return score
+
+
+def score_por_recurso_linha(linha, pesos):
+    """Idem, para uma linha da matriz de características"""
+    score = float(linha[0]) * pesos[CARACTERISTICAS[0]]
+    for j, c in enumerate(CARACTERISTICAS[1:], start=1):
+        score = score + float(linha[j]) * pesos[c]
+    return score
+
+
+@pytest.fixture(scope='module')
+def caminho_catalogo(tmp_path_factory):
+    caminho = tmp_path_factory.mktemp('catalogo') / 'recursos_base.json'
+    caminho.write_text(json.dumps(gerar_catalogo_sintetico(400, random.Random(7))), encoding='utf-8')
+    return caminho
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def catalogo(request, caminho_catalogo, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'CACHE_ARTEFATOS_ATIVO', False)
+    if request.param == 'sqlite':
+        repositorio = RecursosRepositorySQLite(tmp_path / 'recursos.sqlite3', caminho_catalogo)
+    else:
+        repositorio = RecursosRepository(caminho_catalogo)
+    return CatalogoRecursos(repositorio, iniciar_visoes=False)
+
+
+@pytest.mark.parametrize('semente', range(5))
+def test_calcular_scores_igual_a_round(semente):
+    rng = np.random.default_rng(semente)
+    X = rng.random((20000, len(CARACTERISTICAS)))
+    pesos = dict(zip(CARACTERISTICAS, rng.normal(size=len(CARACTERISTICAS))))
+    esperado = [round(score_por_recurso_linha(linha, pesos), 4) for linha in X]
+    assert calcular_scores(X, pesos).tolist() == esperado
+
+
+def test_calcular_scores_em_meios_de_casa():
+    # k/10⁴ + 0,00005: o produto por 1e4 cai em x,5 e decide o lado do arredondamento
+    X = np.zeros((10000, len(CARACTERISTICAS)))
+    X[:, 0] = (np.arange(10000) + 0.5) / 1e4
+    pesos = dict.fromkeys(CARACTERISTICAS, 0.0)
+    pesos[CARACTERISTICAS[0]] = 1.0
+
+    esperado = [round(score_por_recurso_linha(linha, pesos), 4) for linha in X]
+    assert calcular_scores(X, pesos).tolist() == esperado
+
+
+def test_visoes_iguais_ao_calculo_por_recurso(catalogo):
+    motor = catalogo.motor
+    chaves = catalogo.visoes.chaves(motor.versao)
+    areas = sorted({c[0] for c in chaves if c[0] is not None})[:2] + [None]
+    comparadas = 0
+    for area, modalidade, avaliacao, familiaridade, conectividade in itertools.product(
+        areas, ['presencial', None], [False, True], [False, True], [False, True]
+    ):
+        respostas = RespostasQuestionario({
+            'disciplina': area,
+            'modalidade': modalidade,
+            'necessidadeAvaliacao': avaliacao,
+            'familiaridadeTech': 0.0 if familiaridade else 1.0,
+            'conectividade': 0.0 if conectividade else 1.0
+        })
+        visao = catalogo.visoes.obter(respostas, motor)
+        candidatos, _ = catalogo.repositorio.obter_candidatos(respostas)
+
+        scores = [round(score_por_recurso(r, motor.pesos), 4) for r in candidatos]
+        ordem = sorted(range(len(candidatos)), key=lambda i: -scores[i])
+        assert visao.ids.tolist() == [candidatos[i].id for i in ordem]
+        assert visao.scores.tolist() == [scores[i] for i in ordem]
+
+        if candidatos:
+            labels = AgrupadorSimilaridade(None).agrupar_recursos(
+                candidatos, n_clusters=min(3, len(candidatos))
+            )['labels']
+            assert visao.clusters.tolist() == [int(labels[i]) for i in ordem]
+        comparadas += bool(candidatos)
+    assert comparadas > 0
@@ -15,6 +15,15 @@ export const recursosService = {
     const response = await api.get("/recursos");
     return response.data;
   },
+  // filtros: { area, categoria, tag, modalidade, dispositivo, offline, avaliacao, limit, cursor, campos }
+  listar: async (filtros = {}) => {
+    const response = await api.get("/recursos", { params: filtros });
+    return response.data;
+  },
+  buscar: async (q, opcoes = {}) => {
+    const response = await api.get("/recursos/busca", { params: { q, ...opcoes } });
+    return response.data;
+  },
 };
 
 export const recomendacoesService = {